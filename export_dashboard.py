@@ -1,34 +1,69 @@
 import asyncio
+import base64
+import functools
+import hashlib
 import os
 import json
 import logging
+import re
+import stat
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict
 
 import pandas as pd
 import requests
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, FileResponse, Response
 from pydantic import BaseModel, field_validator
-from playwright.async_api import async_playwright, Page, Download
+from playwright.async_api import async_playwright, Page, Download, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+import google_auth_httplib2
+import httplib2
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="PwC Export Dashboard")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep one Chromium resident for the life of the app (on_event hooks are deprecated in FastAPI)"""
+    await warm_browser()
+    try:
+        yield
+    finally:
+        await close_browser()
+
+
+app = FastAPI(title="PwC Export Dashboard", lifespan=lifespan)
 
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 GOOGLE_CREDENTIALS_JSON = os.getenv("GOOGLE_CREDENTIALS_JSON")
 TMP_DIR = Path("/tmp")
 SESSION_PATH = TMP_DIR / "pwc"
 SNAPSHOTS_DIR = TMP_DIR / "snapshots"
+# One .xlsx per tab, see TAB_FILENAMES. Point EXPORT_DOWNLOAD_DIR at a tmpfs (e.g. /dev/shm/dashboard_exports)
+# to keep downloads off the overlay disk - only if /dev/shm is sized for Chromium plus the exports
+DOWNLOAD_DIR = Path(os.getenv("EXPORT_DOWNLOAD_DIR", str(TMP_DIR / "dashboard_exports")))
 SNAPSHOTS_DIR.mkdir(parents=True, exist_ok=True)
 SESSION_PATH.mkdir(parents=True, exist_ok=True)
+DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 EXPORT_TIMEOUT = 240000  # 4 minutes in milliseconds (240,000 ms)
+TAB_LOAD_TIMEOUT = 50  # seconds - upper bound for a tab to load after it is clicked
+# Seconds to pause between sequential tab exports on the same page (the portal was asked to get 30s;
+# set INTER_TAB_COOLDOWN=0 to rely only on the next tab's own readiness wait)
+INTER_TAB_COOLDOWN = max(0, int(os.getenv("INTER_TAB_COOLDOWN", "30")))
+SHEETS_APPEND_CHUNK_ROWS = 5000  # rows per values.append request
+XLSX_MAGIC = b"PK\x03\x04"  # .xlsx files are ZIP archives
+DASHBOARD_URL = "https://compliancenominationportal.in.pwc.com/BGVAdmin/BGVDashboard"
 TABS = [
     "Today's allocated",
     "Not started",
@@ -38,14 +73,85 @@ TABS = [
     "Work in progress",
     "BGV closed",
 ]
+# Export file per tab, computed once - "/" would otherwise turn "Rejected / Insufficient" into a subdirectory
+TAB_FILENAMES = {tab: f"{tab.replace('/', '-')}.xlsx" for tab in TABS}
+
+# Tabs exported at once, each in its own browser context. Defaults to 1 (sequential on one
+# page) because the portal can reject parallel use of a session with AccessDeniedConcurrent.
+EXPORT_CONCURRENCY = max(1, int(os.getenv("EXPORT_CONCURRENCY", "1")))
+# Tabs synced to Sheets at once - each tab is its own sheet, bounded to stay under the per-user write quota
+SHEETS_TAB_CONCURRENCY = max(1, int(os.getenv("SHEETS_TAB_CONCURRENCY", "4")))
+SHEETS_NUM_RETRIES = 5  # googleapiclient retries 429/5xx with exponential backoff
 
-# Lock to prevent concurrent exports
-export_lock = asyncio.Lock()
+# Single-export guard. A plain flag rather than an asyncio.Lock: a background export job keeps the
+# slot after its request has returned, and check-and-set has no await in between so it cannot race
 export_in_progress = False
 current_export_session_id = None
 
+# Background export jobs (POST /export-dashboard with background=true), newest last; only the
+# most recent EXPORT_JOBS_KEPT are remembered for /export-status
+EXPORT_JOBS: Dict[str, Dict] = {}
+EXPORT_JOBS_KEPT = 50
+_export_job_tasks = set()  # strong refs so running jobs aren't garbage-collected
 
-def get_sheets_service():
+# googleapiclient is blocking - run .execute() here so the event loop keeps serving requests
+_SHEETS_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sheets")
+_sheets_local = threading.local()
+
+
+# Unescaped CR/LF inside the credentials JSON (env var pasted with real newlines)
+_NEWLINE_RE = re.compile(r'(?<!\\)[\r\n]')
+_NEWLINE_ESCAPES = {"\n": "\\n", "\r": "\\r"}
+_PRIVATE_KEY_RE = re.compile(r'"private_key"\s*:\s*"([^"]*)"')
+_UNSAFE_FILENAME_RE = re.compile(r"[\s/\\]+")
+# Where a dashboard navigation can land: the dashboard itself, the concurrent-session bounce, or the error page
+_DASHBOARD_LANDING_RE = re.compile(r"BGVDashboard|AccessDenied|ErrorPage|Oops")
+_ERROR_PAGE_RE = re.compile(r"ErrorPage|Oops")
+# Images, fonts, media and analytics beacons the export never needs. Matched by URL so only these requests
+# are routed through Python; stylesheets stay, since visibility checks depend on the dashboard's CSS
+_BLOCKED_REQUEST_RE = re.compile(
+    r"\.(?:png|jpe?g|gif|webp|svg|ico|woff2?|ttf|otf|eot|mp4|webm)(?:[?#]|$)"
+    r"|google-analytics\.com|googletagmanager\.com|doubleclick\.net",
+    re.IGNORECASE,
+)
+_ON_DASHBOARD_RE = re.compile(r"BGVDashboard|/dashboard", re.IGNORECASE)
+
+
+def _parse_creds_direct(creds_json: str):
+    """Try 1: Direct JSON parse (if properly formatted)"""
+    return json.loads(creds_json)
+
+
+def _parse_creds_lenient(creds_json: str):
+    """Try 2: Allow raw control characters inside strings (private_key pasted with actual newlines)"""
+    return json.loads(creds_json, strict=False)
+
+
+def _parse_creds_newline_fix(creds_json: str):
+    """Try 3: Escape literal newlines (private_key pasted with actual newlines)"""
+    fixed_json = _NEWLINE_RE.sub(lambda m: _NEWLINE_ESCAPES[m.group()], creds_json)
+    # Now unescape: convert \\n back to \n for JSON parsing
+    fixed_json = fixed_json.replace('\\\\n', '\\n').replace('\\\\r', '\\r')
+    return json.loads(fixed_json)
+
+
+def _parse_creds_base64(creds_json: str):
+    """Try 4: Base64 decode if it looks encoded"""
+    return json.loads(base64.b64decode(creds_json).decode('utf-8'))
+
+
+def _parse_creds_private_key_fix(creds_json: str):
+    """Try 5: Escape newlines inside the private_key value only, leaving the JSON's own line breaks alone"""
+    match = _PRIVATE_KEY_RE.search(creds_json)
+    if not match:
+        raise ValueError("Could not find private_key in JSON")
+    pk_cleaned = match.group(1).replace('\n', '\\n').replace('\r', '\\r')
+    return json.loads(creds_json[:match.start(1)] + pk_cleaned + creds_json[match.end(1):])
+
+
+@functools.lru_cache(maxsize=1)
+def get_sheets_credentials():
+    """Parse GOOGLE_CREDENTIALS_JSON into service-account credentials (once per process)"""
     if not GOOGLE_CREDENTIALS_JSON:
         raise ValueError("GOOGLE_CREDENTIALS_JSON environment variable is required")
     
@@ -54,67 +160,20 @@ def get_sheets_service():
         
         # Handle the case where JSON might have been stored with actual newlines
         # or where the private_key has literal \n characters that need to be parsed
-        
-        # Strategy: Try multiple parsing approaches
         creds_info = None
         parse_errors = []
-        
-        # Try 1: Direct JSON parse (if properly formatted)
-        try:
-            creds_info = json.loads(creds_json)
-        except json.JSONDecodeError as e1:
-            parse_errors.append(f"Direct parse: {e1}")
-            
-            # Try 2: Replace literal newlines with escaped \n (for private_key)
-            # This handles cases where the env var was pasted with actual newlines
+        for parser in (_parse_creds_direct, _parse_creds_lenient, _parse_creds_newline_fix,
+                       _parse_creds_base64, _parse_creds_private_key_fix):
             try:
-                # Remove any actual newlines outside of string values
-                # But preserve \n escape sequences inside strings
-                import re
-                # Replace actual newlines that are not part of an escape sequence
-                # Pattern: newline not preceded by backslash
-                fixed_json = re.sub(r'(?<!\\)\n', '\\\\n', creds_json)
-                fixed_json = re.sub(r'(?<!\\)\r', '\\\\r', fixed_json)
-                # Now unescape: convert \\n back to \n for JSON parsing
-                fixed_json = fixed_json.replace('\\\\n', '\\n').replace('\\\\r', '\\r')
-                creds_info = json.loads(fixed_json)
-            except (json.JSONDecodeError, Exception) as e2:
-                parse_errors.append(f"Newline fix: {e2}")
-                
-                # Try 3: Base64 decode if it looks encoded
-                try:
-                    import base64
-                    # Check if it's base64 encoded
-                    decoded = base64.b64decode(creds_json).decode('utf-8')
-                    creds_info = json.loads(decoded)
-                except Exception as e3:
-                    parse_errors.append(f"Base64 decode: {e3}")
-                    
-                    # Try 4: Manual reconstruction (last resort)
-                    # Extract key parts and rebuild JSON
-                    try:
-                        # Try to find the pattern and fix it manually
-                        # The error suggests issue at column 166 (likely in private_key)
-                        # Try removing control characters from private_key value
-                        import re
-                        # Pattern: "private_key": "value"
-                        pattern = r'"private_key"\s*:\s*"([^"]*)"'
-                        match = re.search(pattern, creds_json)
-                        if match:
-                            # Get the private key value
-                            pk_value = match.group(1)
-                            # Clean it - replace actual newlines with \n
-                            pk_cleaned = pk_value.replace('\n', '\\n').replace('\r', '\\r')
-                            # Replace in original JSON
-                            fixed_json = creds_json.replace(f'"private_key": "{pk_value}"', f'"private_key": "{pk_cleaned}"')
-                            creds_info = json.loads(fixed_json)
-                        else:
-                            raise ValueError("Could not find private_key in JSON")
-                    except Exception as e4:
-                        parse_errors.append(f"Manual fix: {e4}")
-                        logger.error(f"All parsing attempts failed. Errors: {parse_errors}")
-                        logger.error(f"JSON sample (first 300 chars): {creds_json[:300]}")
-                        raise ValueError(f"Failed to parse GOOGLE_CREDENTIALS_JSON after all attempts. Errors: {parse_errors}")
+                creds_info = parser(creds_json)
+                break
+            except Exception as parse_err:
+                parse_errors.append(f"{parser.__name__}: {parse_err}")
+        
+        if creds_info is None:
+            logger.error(f"All parsing attempts failed. Errors: {parse_errors}")
+            logger.error(f"JSON sample (first 300 chars): {creds_json[:300]}")
+            raise ValueError(f"Failed to parse GOOGLE_CREDENTIALS_JSON after all attempts. Errors: {parse_errors}")
         
         # Validate the structure
         if not isinstance(creds_info, dict):
@@ -126,11 +185,10 @@ def get_sheets_service():
             if '\\n' in creds_info['private_key'] and '\n' not in creds_info['private_key']:
                 creds_info['private_key'] = creds_info['private_key'].replace('\\n', '\n')
         
-        creds = service_account.Credentials.from_service_account_info(
+        return service_account.Credentials.from_service_account_info(
             creds_info, 
             scopes=["https://www.googleapis.com/auth/spreadsheets"]
         )
-        return build("sheets", "v4", credentials=creds)
     except Exception as e:
         logger.error(f"Failed to parse GOOGLE_CREDENTIALS_JSON: {e}")
         logger.error(f"JSON length: {len(GOOGLE_CREDENTIALS_JSON) if GOOGLE_CREDENTIALS_JSON else 0}")
@@ -138,6 +196,40 @@ def get_sheets_service():
         raise ValueError(f"Invalid GOOGLE_CREDENTIALS_JSON: {e}")
 
 
+@functools.lru_cache(maxsize=1)
+def get_sheets_service():
+    """
+    Build the Sheets v4 client once per process from the bundled discovery document
+    (no discovery fetch, no file cache probe). Token refresh on 401 is done by AuthorizedHttp.
+    """
+    return build("sheets", "v4", credentials=get_sheets_credentials(), cache_discovery=False, static_discovery=True)
+
+
+def _thread_http():
+    """Per-thread authorized transport - httplib2.Http is not thread-safe"""
+    http = getattr(_sheets_local, "http", None)
+    if http is None:
+        http = _sheets_local.http = google_auth_httplib2.AuthorizedHttp(get_sheets_credentials(), http=httplib2.Http())
+    return http
+
+
+async def _execute(request, idempotent: bool = False):
+    """
+    Run a googleapiclient request on the shared Sheets thread pool. Only idempotent requests are
+    retried: a retried append or addSheet whose first attempt did land (5xx / timeout after the write)
+    would duplicate the rows or fail with "already exists".
+    """
+    num_retries = SHEETS_NUM_RETRIES if idempotent else 0
+    return await asyncio.get_running_loop().run_in_executor(
+        _SHEETS_POOL, lambda: request.execute(http=_thread_http(), num_retries=num_retries)
+    )
+
+
+async def _get_sheets_service_async():
+    """get_sheets_service() off the event loop (first call builds the client from the bundled discovery document and parses the credentials)"""
+    return await asyncio.get_running_loop().run_in_executor(_SHEETS_POOL, get_sheets_service)
+
+
 async def sync_to_sheets_with_audit(tab_name: str, excel_path: Path, spreadsheet_id: str):
     """
     Sync Excel data to Google Sheets (adds new, updates changed, skips identical).
@@ -147,14 +239,18 @@ async def sync_to_sheets_with_audit(tab_name: str, excel_path: Path, spreadsheet
     """
     try:
         # Get Google Sheets service
-        service = get_sheets_service()
+        service = await _get_sheets_service_async()
         sheets = service.spreadsheets()
         
         logger.info(f"📊 Starting incremental sync for {tab_name}...")
         
         # Read Excel data
         try:
-            df_new = pd.read_excel(excel_path, engine="openpyxl").fillna("").astype(str)
+            # Parse off the event loop - tabs sync concurrently and a large workbook takes seconds.
+            # pandas already opens it with openpyxl read_only=True/data_only=True, and the diff below needs every row.
+            df_new = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: pd.read_excel(excel_path, engine="openpyxl").fillna("").astype(str)
+            )
             logger.info(f"✅ Loaded {len(df_new)} rows from Excel ({len(df_new.columns)} columns)")
         except Exception as e:
             logger.error(f"❌ Failed to read Excel file for {tab_name}: {e}")
@@ -164,41 +260,36 @@ async def sync_to_sheets_with_audit(tab_name: str, excel_path: Path, spreadsheet
             logger.warning(f"⚠️ Excel file for {tab_name} is empty - skipping sync")
             return {"tab": tab_name, "new_rows": 0, "updated_rows": 0, "skipped": 0, "warning": "Empty Excel file"}
         
-        # Check if sheet exists, create if not
+        # Fetch existing data and detect a missing sheet in the same round trip:
+        # a range on a non-existent sheet fails with "Unable to parse range".
+        # sheet_known tells "read fine / just created" apart from "every read failed" (both leave sheet_data empty)
+        sheet_known = False
         try:
-            # Try to get sheet metadata
-            spreadsheet = sheets.get(spreadsheetId=spreadsheet_id).execute()
-            sheet_exists = any(sheet.get("properties", {}).get("title") == tab_name 
-                             for sheet in spreadsheet.get("sheets", []))
-            
-            if not sheet_exists:
-                logger.info(f"📋 Sheet '{tab_name}' doesn't exist - creating new sheet...")
-                # Create new sheet
-                sheets.batchUpdate(
-                    spreadsheetId=spreadsheet_id,
-                    body={"requests": [{"addSheet": {"properties": {"title": tab_name}}}]}
-                ).execute()
-                logger.info(f"✅ Created new sheet '{tab_name}'")
-                sheet_data = []
-            else:
-                # Fetch existing sheet data - use dynamic range (up to column ZZ for 702 columns)
-                try:
-                    # Try A:ZZ first (covers most cases)
-                    sheet_data = (
-                        sheets.values()
-                        .get(spreadsheetId=spreadsheet_id, range=f"'{tab_name}'!A:ZZ")
-                        .execute()
-                        .get("values", [])
-                    )
-                except Exception:
-                    # Fallback to A:Z if A:ZZ fails
+            try:
+                # Try A:ZZ first (covers up to 702 columns)
+                sheet_data = (await _execute(
+                    sheets.values().get(spreadsheetId=spreadsheet_id, range=f"'{tab_name}'!A:ZZ", fields="values"),
+                    idempotent=True,
+                )).get("values", [])
+                sheet_known = True
+            except Exception as get_err:
+                if isinstance(get_err, HttpError) and get_err.resp.status == 400 and "Unable to parse range" in str(get_err):
+                    logger.info(f"📋 Sheet '{tab_name}' doesn't exist - creating new sheet...")
+                    await _execute(sheets.batchUpdate(
+                        spreadsheetId=spreadsheet_id,
+                        body={"requests": [{"addSheet": {"properties": {"title": tab_name}}}]}
+                    ))
+                    logger.info(f"✅ Created new sheet '{tab_name}'")
+                    sheet_data = []
+                    sheet_known = True
+                else:
+                    # Fallback to A:Z if A:ZZ fails (e.g. range exceeds grid limits)
                     try:
-                        sheet_data = (
-                            sheets.values()
-                            .get(spreadsheetId=spreadsheet_id, range=f"'{tab_name}'!A:Z")
-                            .execute()
-                            .get("values", [])
-                        )
+                        sheet_data = (await _execute(
+                            sheets.values().get(spreadsheetId=spreadsheet_id, range=f"'{tab_name}'!A:Z", fields="values"),
+                            idempotent=True,
+                        )).get("values", [])
+                        sheet_known = True
                     except Exception:
                         sheet_data = []
         except Exception as e:
@@ -228,9 +319,10 @@ async def sync_to_sheets_with_audit(tab_name: str, excel_path: Path, spreadsheet
         df_existing = df_existing[all_columns]
         df_new = df_new[all_columns]
         
-        # Normalize (remove type diff, trim spaces)
-        df_existing = df_existing.fillna("").astype(str).apply(lambda x: x.str.strip())
-        df_new = df_new.fillna("").astype(str).apply(lambda x: x.str.strip())
+        # Normalize (remove type diff, trim spaces) - one elementwise pass per frame: Sheets returns
+        # formatted values as strings and df_new was cast to str on read, so only NaN needs filling
+        df_existing = df_existing.fillna("").map(str.strip)
+        df_new = df_new.map(str.strip)
         
         # Identify unique key column (handle variations: "Candidate ID" vs "CandidateID")
         UNIQUE_KEY = None
@@ -271,7 +363,7 @@ async def sync_to_sheets_with_audit(tab_name: str, excel_path: Path, spreadsheet
         logger.info(f"🔑 Using unique key column: '{UNIQUE_KEY}'")
         
         # Ensure UNIQUE_KEY column is valid (not empty for all rows in df_new)
-        if df_new[UNIQUE_KEY].fillna("").eq("").all():
+        if df_new[UNIQUE_KEY].eq("").all():
             logger.warning(f"⚠️ UNIQUE_KEY column '{UNIQUE_KEY}' is empty for all rows in {tab_name} - using row index as fallback")
             df_new[UNIQUE_KEY] = df_new.index.astype(str)
             if not df_existing.empty:
@@ -319,69 +411,69 @@ async def sync_to_sheets_with_audit(tab_name: str, excel_path: Path, spreadsheet
             
             updated_rows = []
             
-            # Detect changes for existing rows
-            for _, row in merged[merged["_merge"] == "both"].iterrows():
-                changed_cols = []
+            # Detect changes for existing rows: one elementwise compare over the _old/_new column
+            # pairs (both sides are already str-normalized and stripped), then visit changed rows only
+            both = merged[merged["_merge"] == "both"]
+            compare_cols = [col for col in all_columns
+                            if col != UNIQUE_KEY and f"{col}_old" in merged.columns and f"{col}_new" in merged.columns]
+            old_values = both[[f"{col}_old" for col in compare_cols]].fillna("").astype(str).to_numpy()
+            new_values = both[[f"{col}_new" for col in compare_cols]].fillna("").astype(str).to_numpy()
+            diff_mask = old_values != new_values
+            changed_positions = diff_mask.any(axis=1).nonzero()[0]
+            
+            if len(changed_positions):
+                # Updated rows take the "_new" side of every column (plain column if it wasn't suffixed)
+                changed = both.iloc[changed_positions]
+                df_changed = pd.DataFrame({UNIQUE_KEY: changed[UNIQUE_KEY].to_numpy()})
                 for col in all_columns:
                     if col == UNIQUE_KEY:
                         continue
-                    old_col = f"{col}_old"
-                    new_col = f"{col}_new"
-                    if old_col in merged.columns and new_col in merged.columns:
-                        try:
-                            old_val = str(row.get(old_col, "")).strip()
-                            new_val = str(row.get(new_col, "")).strip()
-                            if old_val != new_val:
-                                changed_cols.append((col, old_val, new_val))
-                        except Exception:
-                            continue
-                
-                if changed_cols:
-                    # Build updated row using "_new" suffix columns
-                    updated_row = {UNIQUE_KEY: row[UNIQUE_KEY]}
-                    for col in all_columns:
-                        if col == UNIQUE_KEY:
-                            continue
-                        new_col = f"{col}_new"
-                        if new_col in merged.columns:
-                            updated_row[col] = str(row.get(new_col, "")).strip()
-                        else:
-                            updated_row[col] = str(row.get(col, "")).strip()
-                    updated_rows.append(updated_row)
-                    
-                    change_details = ", ".join([f"{c}: '{o[:20]}...' → '{n[:20]}...'" if len(str(o)) > 20 or len(str(n)) > 20 else f"{c}: '{o}' → '{n}'" 
-                                               for c, o, n in changed_cols[:2]])  # Log first 2 changes
-                    if len(changed_cols) > 2:
-                        change_details += f" (+{len(changed_cols) - 2} more)"
-                    logger.info(f"✏️ {tab_name} | {UNIQUE_KEY}={row[UNIQUE_KEY]} | {change_details}")
-        
-        # If no existing sheet data, write headers first
-        if not sheet_data and not new_rows.empty:
-            # Write headers
-            headers = [all_columns]
+                    source_col = f"{col}_new" if f"{col}_new" in merged.columns else col
+                    df_changed[col] = changed[source_col].fillna("").astype(str).str.strip().to_numpy() if source_col in merged.columns else ""
+                updated_rows = df_changed.to_dict("records")
+            
+            for pos in changed_positions:
+                row_key = both[UNIQUE_KEY].iat[pos]
+                changed_cols = [(compare_cols[i], old_values[pos, i], new_values[pos, i]) for i in diff_mask[pos].nonzero()[0]]
+                change_details = ", ".join([f"{c}: '{o[:20]}...' → '{n[:20]}...'" if len(str(o)) > 20 or len(str(n)) > 20 else f"{c}: '{o}' → '{n}'" 
+                                           for c, o, n in changed_cols[:2]])  # Log first 2 changes
+                if len(changed_cols) > 2:
+                    change_details += f" (+{len(changed_cols) - 2} more)"
+                logger.info(f"✏️ {tab_name} | {UNIQUE_KEY}={row_key} | {change_details}")
+        
+        # Sheet could not be read: it may well hold data, so an appended header would land mid-sheet.
+        # Write it in place at A1 instead (harmless if row 1 already is the header)
+        if not sheet_known and not new_rows.empty:
             try:
-                sheets.values().update(
+                await _execute(sheets.values().update(
                     spreadsheetId=spreadsheet_id,
                     range=f"'{tab_name}'!A1",
                     valueInputOption="RAW",
-                    body={"values": headers},
-                ).execute()
-                logger.info(f"📋 Written headers to new sheet '{tab_name}'")
+                    body={"values": [list(all_columns)]},
+                ), idempotent=True)
+                logger.info(f"📋 Written headers to row 1 of '{tab_name}' (sheet contents unknown)")
             except Exception as h_err:
                 logger.warning(f"⚠️ Could not write headers to '{tab_name}': {h_err}")
         
         # ➕ Add only new rows
         if not new_rows.empty:
             try:
-                # Prepare data for Google Sheets (list of lists)
-                new_rows_values = new_rows.fillna("").values.tolist()
-                sheets.values().append(
-                    spreadsheetId=spreadsheet_id,
-                    range=f"'{tab_name}'!A1",
-                    valueInputOption="RAW",
-                    insertDataOption="INSERT_ROWS",
-                    body={"values": new_rows_values},
-                ).execute()
+                # Append in bounded chunks - keeps each POST under the Sheets request size cap
+                # and only materializes one chunk's list-of-lists at a time
+                for start in range(0, len(new_rows), SHEETS_APPEND_CHUNK_ROWS):
+                    chunk = new_rows.iloc[start:start + SHEETS_APPEND_CHUNK_ROWS]
+                    new_rows_values = chunk.fillna("").astype(str).to_numpy().tolist()
+                    if start == 0 and sheet_known and not sheet_data:
+                        # Confirmed-empty sheet: the header row rides along with the first chunk (lands in row 1)
+                        new_rows_values.insert(0, list(all_columns))
+                        logger.info(f"📋 Writing headers to new sheet '{tab_name}' with the first chunk")
+                    await _execute(sheets.values().append(
+                        spreadsheetId=spreadsheet_id,
+                        range=f"'{tab_name}'!A1",
+                        valueInputOption="RAW",
+                        insertDataOption="INSERT_ROWS",
+                        body={"values": new_rows_values},
+                    ))
                 logger.info(f"➕ Added {len(new_rows)} new rows to '{tab_name}'")
             except Exception as append_err:
                 logger.error(f"❌ Failed to append new rows to '{tab_name}': {append_err}")
@@ -390,22 +482,35 @@ async def sync_to_sheets_with_audit(tab_name: str, excel_path: Path, spreadsheet
         # ✏️ Update modified rows
         if updated_rows:
             try:
-                df_updates = pd.DataFrame(updated_rows)
-                for _, row in df_updates.iterrows():
-                    # Find row index in existing data
-                    if not df_existing.empty:
-                        row_indices = df_existing[df_existing[UNIQUE_KEY] == row[UNIQUE_KEY]].index
-                        if not row_indices.empty:
-                            # Google Sheets uses 1-based indexing, and row 1 is header
-                            sheet_row_num = row_indices[0] + 2
-                            # Convert row to list matching column order
-                            row_values = [str(row.get(col, "")) for col in all_columns]
-                            sheets.values().update(
-                                spreadsheetId=spreadsheet_id,
-                                range=f"'{tab_name}'!A{sheet_row_num}",
-                                valueInputOption="RAW",
-                                body={"values": [row_values]},
-                            ).execute()
+                # Convert all rows to lists matching column order in one NumPy pass
+                df_updates = pd.DataFrame(updated_rows).reindex(columns=all_columns).fillna("").astype(str)
+                update_values = df_updates.to_numpy().tolist()
+                # Key -> first row position in the sheet, built once (a per-row mask was O(N) each)
+                existing_rows = {}
+                for pos, key in enumerate(df_existing[UNIQUE_KEY]):
+                    existing_rows.setdefault(key, pos)
+                # Sheet row -> values. Duplicate keys resolve to the same sheet row; the last payload
+                # is the one that would have stuck, so earlier ones are never sent
+                row_payloads = {}
+                matched = 0
+                for row_key, row_values in zip(df_updates[UNIQUE_KEY], update_values):
+                    pos = existing_rows.get(row_key)
+                    if pos is not None:
+                        # Google Sheets uses 1-based indexing, and row 1 is header
+                        row_payloads[pos + 2] = row_values
+                        matched += 1
+                if len(row_payloads) < matched:
+                    logger.info(f"🟰 Dropped {matched - len(row_payloads)} redundant update(s) for duplicate keys in '{tab_name}'")
+                update_data = [
+                    {"range": f"'{tab_name}'!A{sheet_row_num}", "values": [row_values]}
+                    for sheet_row_num, row_values in row_payloads.items()
+                ]
+                # One values.batchUpdate per chunk instead of one values.update per changed row
+                for start in range(0, len(update_data), SHEETS_APPEND_CHUNK_ROWS):
+                    await _execute(sheets.values().batchUpdate(
+                        spreadsheetId=spreadsheet_id,
+                        body={"valueInputOption": "RAW", "data": update_data[start:start + SHEETS_APPEND_CHUNK_ROWS]},
+                    ), idempotent=True)  # fixed ranges - rewriting the same values is harmless
                 logger.info(f"✅ Updated {len(updated_rows)} modified rows in '{tab_name}'")
             except Exception as update_err:
                 logger.error(f"❌ Failed to update rows in '{tab_name}': {update_err}")
@@ -427,49 +532,70 @@ async def sync_to_sheets_with_audit(tab_name: str, excel_path: Path, spreadsheet
         return {"tab": tab_name, "error": str(e)}
 
 
-async def sync_all_tabs_to_sheets(download_dir: Path, spreadsheet_id: str):
+async def _ensure_tab_sheets(spreadsheet_id: str, titles):
+    """Create every missing sheet in `titles` with a single batchUpdate (one addSheet request each)"""
+    service = await _get_sheets_service_async()
+    spreadsheet = await _execute(service.spreadsheets().get(spreadsheetId=spreadsheet_id, fields="sheets.properties.title"), idempotent=True)
+    existing = {sheet["properties"]["title"] for sheet in spreadsheet.get("sheets", [])}
+    missing = [title for title in titles if title not in existing]
+    if missing:
+        await _execute(service.spreadsheets().batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            body={"requests": [{"addSheet": {"properties": {"title": title}}} for title in missing]}
+        ))
+        logger.info(f"✅ Created {len(missing)} missing sheet(s): {', '.join(missing)}")
+
+
+async def _precreate_tab_sheets(spreadsheet_id: str, titles):
     """
-    Upload all exported Excel files to Google Sheets.
-    
-    ROOT FIX: Each tab is processed independently with fresh context.
+    Create all missing sheets up front in one round-trip. Non-fatal: sync_to_sheets_with_audit
+    still falls back to its own addSheet if this fails.
     """
-    import gc
-    
-    tab_results = []
-    
-    logger.info(f"\n{'='*70}")
-    logger.info(f"🚀 Starting sync for {len(TABS)} tabs")
-    logger.info(f"📁 Download directory: {download_dir}")
-    logger.info(f"{'='*70}\n")
-    
-    for idx, tab in enumerate(TABS, 1):
+    try:
+        await _ensure_tab_sheets(spreadsheet_id, titles)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not pre-create missing sheets: {e} - tabs will create their own")
+
+
+async def sync_tab_file(idx: int, tab: str, download_dir: Path, spreadsheet_id: str, semaphore: asyncio.Semaphore):
+    """Sync one tab's exported file to its sheet. Never raises - failures become an error result."""
+    async with semaphore:
         try:
-            logger.info(f"\n{'='*70}")
             logger.info(f"📋 Processing tab {idx}/{len(TABS)}: {tab}")
-            logger.info(f"{'='*70}")
             
-            excel_path = download_dir / f"{tab}.xlsx"
+            excel_path = download_dir / TAB_FILENAMES[tab]
             
             if not excel_path.exists():
                 logger.warning(f"⚠️ Excel file not found for {tab}: {excel_path}")
-                tab_results.append({"tab": tab, "status": "error", "error": "Excel file not found"})
-                continue
+                return {"tab": tab, "status": "error", "error": "Excel file not found"}
             
-            # ROOT FIX: Process each tab independently with explicit cleanup between tabs
             result = await sync_to_sheets_with_audit(tab, excel_path, spreadsheet_id)
-            tab_results.append(result)
-            
-            # ROOT FIX: Explicit cleanup between tabs
-            gc.collect()
             logger.info(f"✅ Completed sync for {tab} (tab {idx}/{len(TABS)})")
+            return result
             
-            # Small delay between tabs to ensure file system is ready
-            if idx < len(TABS):
-                await asyncio.sleep(1)
-                
         except Exception as e:
             logger.error(f"❌ Error syncing {tab} to Sheets: {e}")
-            tab_results.append({"tab": tab, "status": "error", "error": str(e)})
+            return {"tab": tab, "status": "error", "error": str(e)}
+
+
+async def sync_all_tabs_to_sheets(download_dir: Path, spreadsheet_id: str):
+    """
+    Upload all exported Excel files to Google Sheets.
+    
+    Each tab is processed independently (up to SHEETS_TAB_CONCURRENCY at once, results in TABS
+    order); its DataFrames are released when the sync call returns.
+    """
+    logger.info(f"\n{'='*70}")
+    logger.info(f"🚀 Starting sync for {len(TABS)} tabs ({SHEETS_TAB_CONCURRENCY} at a time)")
+    logger.info(f"📁 Download directory: {download_dir}")
+    logger.info(f"{'='*70}\n")
+    
+    await _precreate_tab_sheets(spreadsheet_id, [tab for tab in TABS if (download_dir / TAB_FILENAMES[tab]).exists()])
+    
+    semaphore = asyncio.Semaphore(SHEETS_TAB_CONCURRENCY)
+    tab_results = list(await asyncio.gather(
+        *(sync_tab_file(idx, tab, download_dir, spreadsheet_id, semaphore) for idx, tab in enumerate(TABS, 1))
+    ))
     
     logger.info(f"\n{'='*70}")
     logger.info(f"✅ Google Sheets upload completed: {len(tab_results)} tab(s) processed")
@@ -478,78 +604,96 @@ async def sync_all_tabs_to_sheets(download_dir: Path, spreadsheet_id: str):
     return tab_results
 
 
+def _screenshot_path(tag: str) -> str:
+    """/tmp/<tag>_<HHMMSS>.png for a failure screenshot (spaces and slashes in tab names made filename-safe)"""
+    return f"/tmp/{_UNSAFE_FILENAME_RE.sub('_', tag)}_{datetime.now().strftime('%H%M%S')}.png"
+
+
+async def snap_error(page: Page, tag: str) -> str:
+    """Viewport screenshot for a failure branch - full-page captures stitch and encode the whole scroll height"""
+    path = _screenshot_path(tag)
+    await page.screenshot(path=path)
+    return path
+
+
 async def click_force(page: Page, selector: str, timeout=5000, name="element"):
     """Universal click function with proper locator usage"""
     for attempt in range(3):
         try:
-            await page.wait_for_selector(selector, timeout=timeout)
+            # Returns as soon as the element is visible - no fixed settle delay needed
+            await page.wait_for_selector(selector, timeout=timeout, state="visible")
             # CRITICAL: Use locator.click() not locator()()
             locator = page.locator(selector).first
             await locator.scroll_into_view_if_needed()
-            await asyncio.sleep(1)
             await locator.click(force=True)
             logger.info(f"✅ Clicked {name} via {selector}")
             return True
         except Exception as e:
             logger.warning(f"Retrying click for {name} ({attempt+1}/3): {e}")
-            await asyncio.sleep(3)
-    screenshot_path = f"/tmp/{name.replace(' ', '_')}_fail_{datetime.now().strftime('%H%M%S')}.png"
-    await page.screenshot(path=screenshot_path, full_page=True)
+            await page.wait_for_load_state("domcontentloaded")
+    screenshot_path = await snap_error(page, f"{name}_fail")
     raise Exception(f"{name} not clickable after retries (screenshot: {screenshot_path})")
 
 
-async def wait_full_load(page: Page, seconds=30, name="page"):
-    logger.info(f"⏳ Waiting {seconds}s for {name} to load fully...")
-    await asyncio.sleep(seconds)
-    await page.wait_for_load_state("networkidle")
-    await asyncio.sleep(2)
+# Advance search button selectors, built once. Playwright accepts a comma-separated
+# CSS list (including :has-text/:text-is/:visible), so they can be matched by a single
+# locator; :visible keeps a hidden early match from shadowing the real button.
+_ADVANCE_SEARCH_SELECTORS = (
+    'button[data-bs-target="#collapse-advance-serach"]',
+    'button[data-bs-target="#collapse-advance-search"]',
+    'button:has-text("Advance search")',
+    'button:has-text("Advance Search")',
+    'a:has-text("Advance search")',
+    'a:has-text("Advance Search")',
+    ':text-is("Advance search")',
+    ':text-is("Advance Search")',
+    '[aria-label*="Advance search" i]',
+    '[aria-label*="Advance Search" i]',
+    'button[title*="Advance" i]',
+    'a[title*="Advance" i]',
+)
+# :visible so a hidden duplicate earlier in the DOM (e.g. a collapsed mobile nav) can't shadow the live button
+_ADVANCE_SEARCH_VISIBLE_SELECTORS = tuple(f"{sel}:visible" for sel in _ADVANCE_SEARCH_SELECTORS)
+_ADVANCE_SEARCH_FRAME_SELECTORS = (
+    'button:has-text("Advance search")',
+    'button:has-text("Advance Search")',
+    'a:has-text("Advance search")',
+    'a:has-text("Advance Search")',
+    'text="Advance search"',
+    'text="Advance Search"',
+)
 
-
-async def try_click_selector(page: Page, selectors, timeout_per=4000):
-    """Try clicking using multiple selectors (same pattern as login process)"""
-    for sel in selectors:
-        try:
-            await page.wait_for_selector(sel, timeout=timeout_per)
-            # Use locator.click() not page.click()
-            await page.locator(sel).first.click(force=True)
-            return True
-        except Exception:
-            continue
-    return False
+# Enabled check used by the frame fallback (disabled="false"/"" are treated as enabled)
+_IS_ENABLED_JS = """
+    el => {
+        const disabled = el.getAttribute('disabled');
+        return disabled === null || disabled === 'false' || disabled === '';
+    }
+"""
 
 
 async def click_advance_search(page: Page):
     """Click Advance search button using the same robust logic as login process"""
-    logger.info("🔍 Waiting for dashboard to fully load...")
-    await wait_full_load(page, 30, "dashboard")
+    logger.info("🔍 Waiting for dashboard to render Advance search...")
+    await page.wait_for_load_state("domcontentloaded")
     
     # Check current URL
     current_url = page.url
     logger.info(f"📍 Current URL: {current_url}")
     
-    # Wait for dynamic content
-    await asyncio.sleep(3)
-    
-    # Define all possible selectors (same pattern as login)
-    selectors = [
-        'button[data-bs-target="#collapse-advance-serach"]',
-        'button[data-bs-target="#collapse-advance-search"]',
-        'button:has-text("Advance search")',
-        'button:has-text("Advance Search")',
-        'a:has-text("Advance search")',
-        'a:has-text("Advance Search")',
-        'text="Advance search"',
-        'text="Advance Search"',
-        '[aria-label*="Advance search" i]',
-        '[aria-label*="Advance Search" i]',
-        'button[title*="Advance" i]',
-        'a[title*="Advance" i]',
-    ]
-    
-    # Try standard click approach first (same as tryClick in login)
-    clicked = await try_click_selector(page, selectors, timeout_per=4000)
+    # Try standard click approach first: wait once on the union of all selectors instead of
+    # waiting out each in turn, then click by selector priority rather than DOM order. The button
+    # itself is the readiness signal - the dashboard's background polling rarely lets the
+    # network go idle, so this also covers the time a networkidle wait used to take.
+    clicked = False
+    try:
+        locator = await _first_visible(page, _ADVANCE_SEARCH_VISIBLE_SELECTORS, timeout=40000)
+        if locator is not None:
+            await locator.click(force=True)
+            clicked = True
+    except Exception as e:
+        logger.debug("Advance search selectors failed: %s", e)
     if clicked:
-        await asyncio.sleep(2)
         logger.info("✅ Advance Search clicked successfully")
         return
     
@@ -559,37 +703,23 @@ async def click_advance_search(page: Page):
     
     clicked = False
     for frame in all_frames:
-        btn_selectors = [
-            'button:has-text("Advance search")',
-            'button:has-text("Advance Search")',
-            'a:has-text("Advance search")',
-            'a:has-text("Advance Search")',
-            'text="Advance search"',
-            'text="Advance Search"',
-        ]
-        
-        for sel in btn_selectors:
+        for sel in _ADVANCE_SEARCH_FRAME_SELECTORS:
             try:
                 btn = frame.locator(sel).first
                 count = await btn.count()
                 if count > 0:
                     await btn.wait_for(state='attached', timeout=5000)
                     
-                    # Wait for button to be enabled (same as Send my code logic)
-                    for i in range(10):
-                        disabled = await btn.get_attribute('disabled')
-                        if disabled is None or disabled == 'false' or disabled == '':
-                            await btn.click(force=True)
-                            await asyncio.sleep(2)
-                            logger.info("✅ Advance Search clicked via frame detection")
-                            clicked = True
-                            break
-                        await asyncio.sleep(1)  # Wait 1 second before retry
-                    
-                    if clicked:
-                        break
+                    # Wait for button to be enabled (same as Send my code logic) - resolves in the
+                    # browser as soon as the attribute clears instead of polling once a second
+                    handle = await btn.element_handle(timeout=5000)
+                    await frame.wait_for_function(_IS_ENABLED_JS, arg=handle, timeout=10000)
+                    await btn.click(force=True)
+                    logger.info("✅ Advance Search clicked via frame detection")
+                    clicked = True
+                    break
             except Exception as e:
-                logger.debug(f"Frame selector {sel} failed: {e}")
+                logger.debug("Frame selector %s failed: %s", sel, e)
                 continue
         
         if clicked:
@@ -601,33 +731,63 @@ async def click_advance_search(page: Page):
     # Last resort: JavaScript click (same pattern as login)
     logger.info("Attempting JavaScript click...")
     try:
-        js_clicked = await page.evaluate("""
-            () => {
-                const elements = Array.from(document.querySelectorAll('button, a, [role="button"]'));
-                for (let el of elements) {
-                    const text = (el.textContent || '').toLowerCase();
-                    if (text.includes('advance') && text.includes('search')) {
-                        el.click();
-                        return true;
-                    }
-                }
-                return false;
-            }
-        """)
+        js_clicked = await page.evaluate("() => window.__pwcClickAdvanceSearch()")
         if js_clicked:
-            await asyncio.sleep(3)
             logger.info("✅ Advance Search clicked via JavaScript")
             return
     except Exception as e:
         logger.warning(f"JavaScript click failed: {e}")
     
     # Final screenshot before error
-    error_screenshot = f"/tmp/advance_search_error_{datetime.now().strftime('%H%M%S')}.png"
-    await page.screenshot(path=error_screenshot, full_page=True)
+    error_screenshot = await snap_error(page, "advance_search_error")
     logger.error(f"❌ Advance Search not found. Error screenshot: {error_screenshot}")
     raise Exception(f"Advance Search not clickable after all attempts. URL: {current_url}")
 
 
+async def wait_for_tab_ready(page: Page, tab_name: str, need_change: bool, seconds: int = TAB_LOAD_TIMEOUT):
+    """
+    Wait until the clicked tab itself is active and its grid has loaded (see __pwcTabReady), falling
+    back to the old fixed 50s delay. A tab click doesn't navigate and the dashboard polls in the
+    background, so networkidle says nothing about the grid. `need_change` is False when the tab was
+    already selected before the click, since its grid then has no reason to change.
+    """
+    started = asyncio.get_running_loop().time()
+    try:
+        await page.wait_for_function(
+            "([name, needChange]) => window.__pwcTabReady(name, needChange)",
+            arg=[tab_name, need_change], polling=250, timeout=seconds * 1000,
+        )
+        logger.info(f"✅ Tab '{tab_name}' ready after {asyncio.get_running_loop().time() - started:.1f}s")
+    except PlaywrightTimeoutError:
+        logger.warning(f"⚠️ Tab '{tab_name}' readiness not signalled within {seconds}s - continuing")
+    except PlaywrightError as e:
+        # e.g. "Execution context was destroyed" when the tab click reloads the page
+        logger.warning(f"⚠️ Tab '{tab_name}' readiness check interrupted ({e}) - continuing")
+
+
+# Export to Excel selectors in priority order. The button has ID "downloadExcel":
+# <input type="button" value="Export to excel" id="downloadExcel" class="btn btn-danger clsdisableAction">
+_EXPORT_SELECTORS = (
+    '#downloadExcel',  # Primary selector - exact ID from HTML
+    'input[id="downloadExcel"]',  # Input button with this ID
+    'input[value="Export to excel"][id="downloadExcel"]',  # More specific
+    'button:has-text("Export to excel")',
+    'button:has-text("Export to Excel")',
+    'input[value="Export to excel"]',
+    'input[value="Export to Excel"]',
+    'a:has-text("Export to excel")',
+    'a:has-text("Export to Excel")',
+    '[aria-label*="Export" i]',
+    '[title*="Export" i]',
+    'button[title*="Export" i]',
+    'a[title*="Export" i]',
+    'button[aria-label*="Export" i]',
+    'a[aria-label*="Export" i]',
+)
+# Single union locator: one 30s wait for any of them instead of 30s per selector
+_EXPORT_SELECTOR = ", ".join(f"{sel}:visible" for sel in _EXPORT_SELECTORS)
+
+
 async def export_tab(page: Page, tab_name: str, download_dir: Path, is_first_tab: bool = False):
     # NOTE: is_first_tab parameter kept for backward compatibility but all tabs are clicked now
     logger.info(f"📊 Exporting tab: {tab_name}")
@@ -645,64 +805,53 @@ async def export_tab(page: Page, tab_name: str, download_dir: Path, is_first_tab
         f'*:has-text("{tab_name}")',
     ]
     
+    # Snapshot the grid first so readiness can tell the new tab's data from the previous tab's
+    try:
+        was_active = await page.evaluate("name => { window.__pwcGridSnapshot(); return window.__pwcTabActive(name); }", tab_name)
+    except PlaywrightError as e:
+        # No snapshot - readiness then only waits for the tab to be active and its grid to settle
+        logger.warning(f"⚠️ Could not snapshot grid before clicking '{tab_name}': {e}")
+        was_active = False
+    
     tab_clicked = False
     
-    # Strategy 1: Try Playwright locator clicks
+    # Strategy 1: Try Playwright locator clicks, most specific selector first. is_visible() is a
+    # single non-waiting check, so a selector that doesn't match costs one round-trip, not a timeout
     for tab_sel in tab_selectors:
         try:
             locator = page.locator(tab_sel).first
-            if await locator.is_visible(timeout=5000):
+            if await locator.is_visible():
+                # scroll_into_view_if_needed already waits for the element to be stable
                 await locator.scroll_into_view_if_needed()
-                await asyncio.sleep(0.5)
                 await locator.click(force=True)
                 logger.info(f"✅ Clicked tab '{tab_name}' via selector: {tab_sel}")
                 tab_clicked = True
                 break
         except Exception as e:
-            logger.debug(f"Tab selector {tab_sel} failed: {e}")
+            logger.debug("Tab selector %s failed: %s", tab_sel, e)
             continue
     
     # Strategy 2: If Playwright failed, try JavaScript click
     if not tab_clicked:
         logger.warning(f"Playwright clicks failed, trying JavaScript click for tab '{tab_name}'")
         try:
-            js_clicked = await page.evaluate(f"""
-                (tabName) => {{
-                    // Try to find tab by text content
-                    const allElements = Array.from(document.querySelectorAll('*'));
-                    for (let el of allElements) {{
-                        const text = (el.textContent || el.innerText || '').trim();
-                        if (text === tabName || text.includes(tabName)) {{
-                            // Check if it's clickable (button, link, or has click handler)
-                            if (el.tagName === 'BUTTON' || el.tagName === 'A' || 
-                                el.tagName === 'LI' || el.getAttribute('role') === 'tab' ||
-                                el.onclick || el.getAttribute('data-tab')) {{
-                                el.click();
-                                return true;
-                            }}
-                        }}
-                    }}
-                    return false;
-                }}
-            """, tab_name)
+            js_clicked = await page.evaluate("(tabName) => window.__pwcClickTab(tabName)", tab_name)
             
             if js_clicked:
                 logger.info(f"✅ Clicked tab '{tab_name}' via JavaScript")
                 tab_clicked = True
-                await asyncio.sleep(2)
             else:
                 logger.error(f"❌ JavaScript could not find clickable element for tab '{tab_name}'")
         except Exception as js_err:
             logger.error(f"❌ JavaScript click failed: {js_err}")
     
     if not tab_clicked:
-        screenshot_path = f"/tmp/tab_click_fail_{tab_name.replace(' ', '_')}_{datetime.now().strftime('%H%M%S')}.png"
-        await page.screenshot(path=screenshot_path, full_page=True)
+        screenshot_path = await snap_error(page, f"tab_click_fail_{tab_name}")
         raise Exception(f"Could not click tab: {tab_name} (screenshot: {screenshot_path})")
     
-    # USER REQUEST: Wait 50 seconds for page to load after clicking tab
-    logger.info(f"⏳ Waiting 50 seconds for tab '{tab_name}' to load after confirmation...")
-    await asyncio.sleep(50)
+    # USER REQUEST: Give the tab up to 50 seconds to load after clicking it
+    logger.info(f"⏳ Waiting up to {TAB_LOAD_TIMEOUT}s for tab '{tab_name}' to load after confirmation...")
+    await wait_for_tab_ready(page, tab_name, need_change=not was_active)
     logger.info(f"✅ Tab '{tab_name}' loaded after confirmation")
 
     # Step 3: Click "Export to excel" button
@@ -711,25 +860,7 @@ async def export_tab(page: Page, tab_name: str, download_dir: Path, is_first_tab
     # HTML: <input type="button" value="Export to excel" id="downloadExcel" class="btn btn-danger clsdisableAction">
     logger.info(f"📥 Step 3: Looking for Export to Excel button for {tab_name}...")
     
-    file_path = download_dir / f"{tab_name}.xlsx"
-    
-    export_selectors = [
-        '#downloadExcel',  # Primary selector - exact ID from HTML
-        'input[id="downloadExcel"]',  # Input button with this ID
-        'input[value="Export to excel"][id="downloadExcel"]',  # More specific
-        'button:has-text("Export to excel")',
-        'button:has-text("Export to Excel")',
-        'input[value="Export to excel"]',
-        'input[value="Export to Excel"]',
-        'a:has-text("Export to excel")',
-        'a:has-text("Export to Excel")',
-        '[aria-label*="Export" i]',
-        '[title*="Export" i]',
-        'button[title*="Export" i]',
-        'a[title*="Export" i]',
-        'button[aria-label*="Export" i]',
-        'a[aria-label*="Export" i]',
-    ]
+    file_path = download_dir / TAB_FILENAMES[tab_name]
     
     # ROOT FIX: Set up download listener BEFORE clicking (must be active when click happens)
     # expect_download context manager catches the NEXT download
@@ -739,13 +870,19 @@ async def export_tab(page: Page, tab_name: str, download_dir: Path, is_first_tab
         # Click button while download listener is active
         export_clicked = False
         for attempt in range(3):
-            for sel in export_selectors:
+            try:
+                # Wait up to 30 seconds for ANY export selector to become visible
+                await page.locator(_EXPORT_SELECTOR).first.wait_for(state="visible", timeout=30000)
+            except Exception as e:
+                logger.debug("Export button not visible (attempt %d/3): %s", attempt + 1, e)
+                continue
+            # Something is visible - pick the highest-priority match without further waiting
+            for sel in _EXPORT_SELECTORS:
                 try:
-                    # Wait up to 30 seconds for button to appear
-                    await page.wait_for_selector(sel, timeout=30000)
-                    locator = page.locator(sel).first
+                    locator = page.locator(f"{sel}:visible").first
+                    if not await locator.count():
+                        continue
                     await locator.scroll_into_view_if_needed()
-                    await asyncio.sleep(1)
                     
                     # Click the button (download listener is active)
                     await locator.click(force=True)
@@ -753,55 +890,26 @@ async def export_tab(page: Page, tab_name: str, download_dir: Path, is_first_tab
                     export_clicked = True
                     break
                 except Exception as e:
-                    logger.debug(f"Export selector {sel} failed (attempt {attempt+1}/3): {e}")
-                    await asyncio.sleep(2)
+                    logger.debug("Export selector %s failed (attempt %d/3): %s", sel, attempt + 1, e)
                     continue
             if export_clicked:
                 break
+            await asyncio.sleep(2)
         
         # If all selectors failed, try JavaScript fallback
         if not export_clicked:
             logger.warning("Standard click methods failed, trying JavaScript fallback...")
             try:
-                js_clicked = await page.evaluate("""
-                    () => {
-                        // First, try the specific ID from HTML: id="downloadExcel"
-                        const downloadExcelBtn = document.getElementById('downloadExcel');
-                        if (downloadExcelBtn) {
-                            downloadExcelBtn.click();
-                            return true;
-                        }
-                        
-                        // Fallback: search by text/attributes
-                        const elements = Array.from(document.querySelectorAll('button, input[type="button"], a, [role="button"]'));
-                        for (let el of elements) {
-                            const text = (el.textContent || el.value || '').toLowerCase();
-                            const ariaLabel = (el.getAttribute('aria-label') || '').toLowerCase();
-                            const title = (el.getAttribute('title') || '').toLowerCase();
-                            if ((text.includes('export') && text.includes('excel')) || 
-                                ariaLabel.includes('export') || 
-                                title.includes('export')) {
-                                el.click();
-                                return true;
-                            }
-                        }
-                        return false;
-                    }
-                """)
+                js_clicked = await page.evaluate("() => window.__pwcClickExportExcel()")
                 if js_clicked:
-                    await asyncio.sleep(2)
                     logger.info("✅ Export button clicked via JavaScript")
                     export_clicked = True
             except Exception as js_err:
                 logger.warning(f"JavaScript click failed: {js_err}")
         
         if not export_clicked:
-            screenshot_path = f"/tmp/Export_button_fail_{tab_name.replace(' ', '_')}_{datetime.now().strftime('%H%M%S')}.png"
-            await page.screenshot(path=screenshot_path, full_page=True)
+            screenshot_path = await snap_error(page, f"Export_button_fail_{tab_name}")
             raise Exception(f"Export to Excel button not visible/clickable for {tab_name} after all retries (screenshot: {screenshot_path})")
-        
-        # Small wait for download to initiate after click
-        await asyncio.sleep(2)
     
     # Download received - save it
     logger.info(f"⏳ Download received, saving file for '{tab_name}'...")
@@ -815,56 +923,56 @@ async def export_tab(page: Page, tab_name: str, download_dir: Path, is_first_tab
             raise Exception(f"Download timeout for {tab_name} after {EXPORT_TIMEOUT/1000} seconds")
         raise Exception(f"Download error for {tab_name}: {download_err}")
 
-    await asyncio.sleep(2)
-    
     # CRITICAL: Verify the downloaded file exists and has content
-    if not file_path.exists():
+    try:
+        file_size = file_path.stat().st_size  # one stat answers both "exists?" and "how big?"
+    except FileNotFoundError:
         raise Exception(f"Downloaded file not found: {file_path}")
-    
-    file_size = file_path.stat().st_size
     logger.info(f"📦 Downloaded file size: {file_size} bytes for '{tab_name}'")
     
     if file_size < 100:  # Excel files should be at least 100 bytes (headers)
         raise Exception(f"Downloaded file too small ({file_size} bytes) - likely empty or corrupted")
     
-    # Quick verification: Read first few rows to ensure it's not empty
-    try:
-        import pandas as pd
-        df_check = pd.read_excel(file_path, engine='openpyxl', nrows=5)
-        row_count_check = len(df_check)
-        logger.info(f"✅ File verification: {row_count_check} rows in preview (file size: {file_size} bytes)")
-        
-        if row_count_check == 0:
-            raise Exception(f"Downloaded Excel file appears empty (0 rows found)")
-        
-        # Log a sample of column names to help debug
-        if len(df_check.columns) > 0:
-            logger.info(f"📋 File columns preview: {list(df_check.columns[:5])}")
-    except Exception as verify_err:
-        logger.warning(f"⚠️ Could not verify file content (non-critical): {verify_err}")
-        # Don't fail - file exists and has size, that's good enough
-    
-    # Final verification before returning
-    if not file_path.exists() or file_path.stat().st_size == 0:
-        raise Exception(f"File missing or empty for {tab_name}")
-
-    await asyncio.sleep(1)
-    
-    # USER REQUEST: Wait 30 seconds after export before moving to next tab
-    logger.info(f"⏳ Waiting 30 seconds after export before moving to next tab...")
-    await asyncio.sleep(30)
+    # Quick verification: .xlsx is a ZIP archive - check the magic number instead of parsing it
+    with file_path.open("rb") as fh:
+        magic = fh.read(4)
+    if magic != XLSX_MAGIC:
+        raise Exception(f"Downloaded file for {tab_name} is not an .xlsx (ZIP) file - starts with {magic!r}")
+    logger.info(f"✅ File verification: valid .xlsx container (file size: {file_size} bytes)")
     
-    final_file_size = file_path.stat().st_size
-    logger.info(f"✅ Step 4: Export completed for {tab_name} ({final_file_size} bytes)")
+    logger.info(f"✅ Step 4: Export completed for {tab_name} ({file_size} bytes)")
     logger.info(f"✅ ✅ Tab '{tab_name}' export workflow finished successfully")
-    return {"tab": tab_name, "status": "done", "file_size": final_file_size}
+    return {"tab": tab_name, "status": "done", "file_size": file_size}
+
+
+async def _first_visible(page: Page, selectors, timeout: int, race=None):
+    """
+    Highest-priority visible match among `selectors`, or None. Waits once (up to `timeout` ms) on the
+    union of `race` (default: all selectors) rather than waiting out each selector in turn - leave
+    catch-all selectors that also match <body> out of `race` so the wait can't resolve on them.
+    """
+    race = list(race if race is not None else selectors)
+    union = page.locator(race[0])
+    for sel in race[1:]:
+        union = union.or_(page.locator(sel))
+    try:
+        await union.first.wait_for(state="visible", timeout=timeout)
+    except PlaywrightTimeoutError:
+        pass
+    for sel in selectors:
+        locator = page.locator(sel).first
+        try:
+            if await locator.is_visible():
+                return locator
+        except Exception as e:
+            logger.debug("Selector %s failed: %s", sel, e)
+    return None
 
 
 async def perform_logout(page: Page):
     """Universal logout logic - click 'Welcome Sukrutha CR' text, then logout"""
     try:
         logger.info("🔒 Attempting logout...")
-        await asyncio.sleep(3)  # allow dashboard JS to finish rendering
         
         # USER REQUEST: Click "Welcome Sukrutha CR" (the text, not dropdown arrow)
         # Then click logout from the dropdown that appears
@@ -878,32 +986,17 @@ async def perform_logout(page: Page):
             "*:has-text('Sukrutha CR')"
         ]
         
-        welcome_clicked = False
-        for attempt in range(3):
-            for sel in welcome_selectors:
-                try:
-                    element = await page.wait_for_selector(sel, timeout=8000, state="visible")
-                    if element:
-                        await element.click(force=True)
-                        logger.info(f"✅ Clicked 'Welcome Sukrutha CR' via selector: {sel}")
-                        welcome_clicked = True
-                        await asyncio.sleep(2)  # Wait for dropdown to appear
-                        break
-                except Exception as e:
-                    logger.debug(f"Welcome selector {sel} failed: {e}")
-                    continue
-            if welcome_clicked:
-                break
-        
-        if not welcome_clicked:
-            screenshot = f"/tmp/Profile_dropdown_fail_{datetime.now().strftime('%H%M%S')}.png"
-            await page.screenshot(path=screenshot, full_page=True)
+        # One wait for the greeting to render (same 24s budget as the old 3 attempts), then priority pick
+        welcome = await _first_visible(page, welcome_selectors, timeout=24000,
+                                       race=[sel for sel in welcome_selectors if not sel.startswith("*")])
+        if welcome is None:
+            screenshot = await snap_error(page, "Profile_dropdown_fail")
             logger.error(f"Logout failed: Profile_dropdown not clickable after retries (screenshot: {screenshot})")
             raise Exception(f"Profile_dropdown not clickable after retries (screenshot: {screenshot})")
+        await welcome.click(force=True)
+        logger.info("✅ Clicked 'Welcome Sukrutha CR'")
         
-        await asyncio.sleep(10)
-        
-        # Click logout option
+        # Click logout option - waits for the dropdown to render it instead of a fixed 12s pause
         selectors_logout = [
             "text='Logout'",
             "text='Sign out'",
@@ -913,29 +1006,19 @@ async def perform_logout(page: Page):
             'a:has-text("Log out")',
         ]
         
-        logout_clicked = False
-        for sel in selectors_logout:
-            try:
-                await page.wait_for_selector(sel, timeout=8000)
-                await page.locator(sel).first.click(force=True)
-                logger.info(f"✅ Logout clicked via selector: {sel}")
-                logout_clicked = True
-                break
-            except Exception as e:
-                logger.debug(f"Logout selector {sel} failed: {e}")
-                continue
-        
-        if not logout_clicked:
+        logout = await _first_visible(page, selectors_logout, timeout=20000)
+        if logout is not None:
+            await logout.click(force=True)
+            logger.info("✅ Logout clicked")
+        else:
             logger.warning("Could not click logout link, trying direct URL fallback...")
             try:
-                await page.goto("https://compliancenominationportal.in.pwc.com/Account/LogOff", wait_until="networkidle", timeout=30000)
-                await asyncio.sleep(3)
+                await page.goto("https://compliancenominationportal.in.pwc.com/Account/LogOff", wait_until="domcontentloaded", timeout=30000)
                 logger.info("✅ Logout via direct URL")
-                return
+                # Falls through to the confirmation wait below - the real signal that LogOff finished
             except Exception as logoff_err:
                 logger.warning(f"Direct logout URL failed: {logoff_err}")
         
-        await asyncio.sleep(5)
         try:
             await page.wait_for_selector("text='You are logged-out successfully'", timeout=10000)
             logger.info("✅ Logout confirmed successfully")
@@ -947,346 +1030,587 @@ async def perform_logout(page: Page):
         logger.warning("Continuing despite logout failure")
 
 
+# JavaScript click fallbacks, installed once per context via add_init_script and then
+# invoked by name instead of shipping and re-parsing the function source on every call
+_PAGE_HELPERS_JS = """
+window.__pwcClickAdvanceSearch = () => {
+    const elements = Array.from(document.querySelectorAll('button, a, [role="button"]'));
+    for (let el of elements) {
+        const text = (el.textContent || '').toLowerCase();
+        if (text.includes('advance') && text.includes('search')) {
+            el.click();
+            return true;
+        }
+    }
+    return false;
+};
+
+window.__pwcClickTab = (tabName) => {
+    // Try to find tab by text content - scan clickable candidates only, not every node
+    const candidates = document.querySelectorAll('button, a, li, [role="tab"], [data-tab], [onclick]');
+    for (let el of candidates) {
+        const text = (el.textContent || el.innerText || '').trim();
+        if (text === tabName || text.includes(tabName)) {
+            // Check if it's clickable (button, link, or has click handler)
+            if (el.tagName === 'BUTTON' || el.tagName === 'A' ||
+                el.tagName === 'LI' || el.getAttribute('role') === 'tab' ||
+                el.onclick || el.getAttribute('data-tab')) {
+                el.click();
+                return true;
+            }
+        }
+    }
+    return false;
+};
+
+// The tab control whose own text is exactly `name` (not a tab bar or a tab that merely contains it)
+window.__pwcTabElement = (name) => {
+    const candidates = document.querySelectorAll('[role="tab"], a, button, li, [data-tab]');
+    for (let el of candidates) {
+        if ((el.textContent || '').trim() === name) {
+            return el;
+        }
+    }
+    return null;
+};
+
+// Selected when that control - or the tab item (li / role=tab) wrapping it - is itself marked active
+window.__pwcTabActive = (name) => {
+    const el = window.__pwcTabElement(name);
+    if (!el) {
+        return false;
+    }
+    const item = el.closest('li, [role="tab"]') || el;
+    return [el, item].some(node =>
+        node.classList.contains('active') || node.classList.contains('selected') ||
+        node.getAttribute('aria-selected') === 'true');
+};
+
+// The data grid: the table body with the most rows, plus a cheap signature of what it shows
+window.__pwcGridState = () => {
+    let best = null;
+    for (let table of document.querySelectorAll('table')) {
+        const body = table.tBodies[0] || table;
+        if (!best || body.rows.length > best.rows.length) {
+            best = body;
+        }
+    }
+    if (!best) {
+        return { el: null, sig: '' };
+    }
+    const text = best.textContent || '';
+    return { el: best, sig: best.rows.length + '|' + text.length + '|' + text.slice(0, 200) };
+};
+
+// Remember the grid as it was before the tab click, so readiness can require it to change
+window.__pwcGridSnapshot = () => {
+    window.__pwcGridBefore = window.__pwcGridState();
+    window.__pwcGridLastSig = null;
+};
+
+// Any visible loading overlay / processing indicator
+window.__pwcGridBusy = () => {
+    const busy = document.querySelectorAll(
+        '.dataTables_processing, .blockUI, .loading, .loader, .spinner, .spinner-border, [class*="overlay"][class*="load"]');
+    for (let el of busy) {
+        if (el.offsetParent !== null || el.getClientRects().length) {
+            return true;
+        }
+    }
+    return false;
+};
+
+// Ready = the clicked tab is active, nothing is loading, the grid was replaced or changed since the
+// snapshot (unless the tab was already active), and the grid read the same on two consecutive polls
+window.__pwcTabReady = (name, needChange) => {
+    if (!window.__pwcTabActive(name) || window.__pwcGridBusy()) {
+        window.__pwcGridLastSig = null;
+        return false;
+    }
+    const now = window.__pwcGridState();
+    const before = window.__pwcGridBefore;
+    if (needChange && before && before.el &&
+            now.el === before.el && before.el.isConnected && now.sig === before.sig) {
+        return false;
+    }
+    const stable = window.__pwcGridLastSig === now.sig;
+    window.__pwcGridLastSig = now.sig;
+    return stable;
+};
+
+window.__pwcClickExportExcel = () => {
+    // First, try the specific ID from HTML: id="downloadExcel"
+    const downloadExcelBtn = document.getElementById('downloadExcel');
+    if (downloadExcelBtn) {
+        downloadExcelBtn.click();
+        return true;
+    }
+
+    // Fallback: search by text/attributes
+    const elements = Array.from(document.querySelectorAll('button, input[type="button"], a, [role="button"]'));
+    for (let el of elements) {
+        const text = (el.textContent || el.value || '').toLowerCase();
+        const ariaLabel = (el.getAttribute('aria-label') || '').toLowerCase();
+        const title = (el.getAttribute('title') || '').toLowerCase();
+        if ((text.includes('export') && text.includes('excel')) ||
+            ariaLabel.includes('export') ||
+            title.includes('export')) {
+            el.click();
+            return true;
+        }
+    }
+    return false;
+};
+"""
+
+
+# Process-lifetime browser: launching Chromium costs seconds, a fresh context costs milliseconds
+_playwright = None
+_browser = None
+_browser_lock = asyncio.Lock()
+
+
+async def get_browser():
+    """Return the shared Chromium instance, launching (or relaunching) it on demand"""
+    global _playwright, _browser
+    async with _browser_lock:
+        if _browser is None or not _browser.is_connected():
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+            _browser = await _playwright.chromium.launch(headless=True, args=["--no-sandbox"])
+            logger.info("🌐 Launched shared Chromium browser")
+        return _browser
+
+
+@asynccontextmanager
+async def authenticated_context(storage_state: Dict):
+    """Fresh, isolated context on the shared browser - closed on exit so no cookies leak between runs"""
+    browser = await get_browser()
+    context = await browser.new_context(storage_state=storage_state, accept_downloads=True, service_workers="block")
+    await context.add_init_script(_PAGE_HELPERS_JS)
+    # Fewer requests in flight means less to download before the dashboard and its grids render
+    await context.route(_BLOCKED_REQUEST_RE, lambda route: route.abort())
+    try:
+        yield context
+    finally:
+        await context.close()
+
+
+async def warm_browser():
+    """Launch Chromium at boot so the first export doesn't pay the cold start"""
+    try:
+        await get_browser()
+    except Exception as e:
+        # Not fatal - get_browser() retries on the first export
+        logger.warning(f"⚠️ Could not pre-launch browser at startup: {e}")
+
+
+async def close_browser():
+    """Close the shared browser and stop Playwright"""
+    global _playwright, _browser
+    if _browser is not None:
+        await _browser.close()
+        _browser = None
+    if _playwright is not None:
+        await _playwright.stop()
+        _playwright = None
+
+
+async def _body_text_head(page: Page, limit: int = 512) -> str:
+    """First `limit` chars of the page text - enough to classify an error page without shipping the whole body"""
+    if page.is_closed():
+        return ""
+    return await page.evaluate("n => (document.body ? document.body.innerText : '').slice(0, n)", limit)
+
+
+async def goto_dashboard(page: Page, timeout: int = 30000):
+    """
+    Navigate to the dashboard and return once the URL settles on one of its landing pages.
+    The portal's analytics rarely go quiet for 500ms, so networkidle tends to burn the whole timeout.
+    """
+    await page.goto(DASHBOARD_URL, wait_until="commit", timeout=timeout)
+    try:
+        await page.wait_for_url(_DASHBOARD_LANDING_RE, timeout=timeout)
+    except PlaywrightTimeoutError:
+        # Landed somewhere unexpected (e.g. login page) - the URL checks that follow will report it
+        logger.warning(f"⚠️ Dashboard navigation ended on unexpected URL: {page.url}")
+
+
+async def _fail_if_session_denied(page: Page, url: str, tag: str):
+    """
+    Raise HTTPException(401) if the portal bounced the session to AccessDeniedConcurrent.
+    Screenshots and closes the context first so the caller's session is released.
+    """
+    if "AccessDeniedConcurrent" not in url:
+        return
+    error_screenshot = await snap_error(page, tag)
+    await page.context.close()
+    logger.error(f"❌ Session expired ({tag}) - AccessDeniedConcurrent detected: {url}")
+    raise HTTPException(
+        status_code=401,
+        detail=(
+            f"Session expired — please start new login session via Node.js.\n\n"
+            f"AccessDeniedConcurrent detected. This means:\n"
+            f"1. Another session is still active on PwC server (may need manual logout)\n"
+            f"2. Session storage_state is invalid or expired\n"
+            f"3. Timing issue - Node.js may need more time to close old sessions\n\n"
+            f"Recommended actions:\n"
+            f"- Wait 60+ seconds after Node.js login completes\n"
+            f"- Manually logout from PwC portal in any browser\n"
+            f"- Check if scheduler is running (creates new session every 1h45m)\n\n"
+            f"URL: {url}\n"
+            f"Screenshot: {error_screenshot}"
+        )
+    )
+
+
+async def open_dashboard(page: Page):
+    """
+    Navigate an authenticated page to the BGV dashboard, validate the session and click
+    Advance search so the Export button is available. Raises HTTPException(401) when the
+    session is rejected (AccessDeniedConcurrent) and Exception for other dashboard errors.
+    """
+    # CRITICAL: Navigate directly to dashboard using the valid cookies from storage_state
+    # We skip root URL to avoid any redirect delays or session validation issues
+    # The cookies in storage_state are valid - we just need to use them in this NEW browser context
+    logger.info("🔍 Navigating directly to dashboard using storage_state cookies...")
+    await goto_dashboard(page)
+    
+    # Check current URL after navigation
+    current_url = page.url
+    logger.info(f"📍 Current URL after dashboard navigation: {current_url}")
+    
+    # Check for error page or concurrent access denial (current_url is already set above)
+    logger.info(f"📍 Final current URL: {current_url}")
+    
+    # CRITICAL: Check for AccessDeniedConcurrent - session expired/invalid
+    await _fail_if_session_denied(page, current_url, "session_expired")
+    
+    if _ERROR_PAGE_RE.search(current_url):
+        # No screenshot yet - the retry usually recovers, and final_error_page captures it if not
+        logger.warning(f"Detected error page, retrying dashboard: {current_url}")
+        
+        # Retry the direct URL only - a detour via the home page and a dashboard link
+        # cost two more full page loads and rarely landed anywhere different
+        try:
+            logger.info("Retrying direct dashboard URL...")
+            await goto_dashboard(page)
+            await _fail_if_session_denied(page, page.url, "session_expired_retry")
+        except HTTPException:
+            raise
+        except Exception as nav_err:
+            logger.error(f"Dashboard retry failed: {nav_err}")
+    
+    # Final check - verify we're on dashboard, not error page
+    final_url = page.url
+    logger.info(f"📍 Final URL before validation: {final_url}")
+    
+    # Check for error page in URL
+    if _ERROR_PAGE_RE.search(final_url):
+        error_screenshot = await snap_error(page, "final_error_page")
+        page_text = await _body_text_head(page)
+        
+        # Check if session might be invalid
+        if "not found" in page_text.lower() or "error" in page_text.lower():
+            raise Exception(
+                f"❌ Unable to access dashboard - stuck on error page. "
+                f"This usually means:\n"
+                f"1. Session expired or invalid\n"
+                f"2. User doesn't have dashboard access\n"
+                f"3. Dashboard URL requires authentication that session lacks\n\n"
+                f"Expected: {DASHBOARD_URL}\n"
+                f"Actual URL: {final_url}\n"
+                f"Screenshot: {error_screenshot}\n"
+                f"Please verify the session is valid and try logging in again."
+            )
+        else:
+            raise Exception(f"Unable to access dashboard - stuck on error page: {final_url}. Screenshot: {error_screenshot}")
+    
+    # Check if page has dashboard content
+    try:
+        # Title and body head in one round-trip
+        page_title, page_text = await page.evaluate(
+            "n => [document.title, (document.body ? document.body.innerText : '').slice(0, n)]", 512
+        )
+        
+        # More thorough error detection
+        error_indicators = [
+            "not found" in page_text.lower(),
+            "error" in page_title.lower(),
+            "sorry" in page_text.lower() and "error" in page_text.lower(),
+            "requested page not found" in page_text.lower()
+        ]
+        
+        if any(error_indicators):
+            error_screenshot = await snap_error(page, "dashboard_error")
+            raise Exception(
+                f"Dashboard page appears to have error content. "
+                f"URL: {final_url}\n"
+                f"Page title: {page_title}\n"
+                f"Screenshot: {error_screenshot}"
+            )
+    except Exception as check_err:
+        # If we can't check page content, at least verify URL is correct
+        if not _ERROR_PAGE_RE.search(final_url):
+            logger.warning(f"Could not verify page content but URL looks OK: {check_err}")
+        else:
+            raise check_err
+    
+    # Verify we're actually on dashboard (not just not on error page)
+    if not _ON_DASHBOARD_RE.search(final_url) and "compliancenominationportal" in final_url:
+        logger.warning(f"Not on dashboard URL, but also not on error page: {final_url}")
+        
+        # CRITICAL: Check again for AccessDeniedConcurrent after retry
+        await _fail_if_session_denied(page, final_url, "session_expired_retry")
+        
+        # Try to navigate to dashboard one more time
+        try:
+            await goto_dashboard(page)
+            final_url = page.url
+            
+            # Final check for AccessDeniedConcurrent
+            await _fail_if_session_denied(page, final_url, "session_expired_final")
+            
+            if _ERROR_PAGE_RE.search(final_url):
+                error_screenshot = await snap_error(page, "dashboard_nav_failed")
+                raise Exception(f"Final navigation to dashboard failed. URL: {final_url}. Screenshot: {error_screenshot}")
+        except HTTPException:
+            raise  # Re-raise HTTPException for session expired
+        except Exception as nav_err:
+            if _ERROR_PAGE_RE.search(str(nav_err)):
+                raise
+            logger.warning(f"Dashboard navigation warning: {nav_err}")
+    
+    # CRITICAL: Final validation before proceeding - must not be on error page or AccessDeniedConcurrent
+    final_check_url = page.url
+    
+    # Final check for AccessDeniedConcurrent
+    await _fail_if_session_denied(page, final_check_url, "pre_advance_search_expired")
+    
+    if _ERROR_PAGE_RE.search(final_check_url):
+        error_screenshot = await snap_error(page, "pre_advance_search_error")
+        page_text_final = await _body_text_head(page)
+        raise Exception(
+            f"❌ CRITICAL: Still on error page when trying to click Advance Search!\n"
+            f"This means the session cannot access the dashboard.\n\n"
+            f"Possible causes:\n"
+            f"1. Session expired or invalid\n"
+            f"2. User account doesn't have dashboard access permissions\n"
+            f"3. Dashboard URL changed or requires different authentication\n"
+            f"4. Session storage_state is missing required cookies/state\n\n"
+            f"Current URL: {final_check_url}\n"
+            f"Page contains: {page_text_final[:200]}...\n"
+            f"Screenshot: {error_screenshot}\n\n"
+            f"Action: Please verify login session is valid and user has dashboard access."
+        )
+    
+    # Verify URL actually contains dashboard
+    if not _ON_DASHBOARD_RE.search(final_check_url):
+        logger.warning(f"⚠️ URL doesn't contain 'BGVDashboard' or '/dashboard': {final_check_url}")
+        # This might be OK if it's a redirect, but log it
+    
+    logger.info("✅ Successfully navigated to dashboard - URL validated")
+    
+    # CRITICAL STEP 1: Click "Advance search" FIRST
+    # This makes the "Export to excel" button visible
+    # The Export button (id="downloadExcel") only appears after Advance search is clicked
+    logger.info("🔍 STEP 1: Clicking 'Advance search' to reveal Export button...")
+    await click_advance_search(page)
+    logger.info("✅ 'Advance search' clicked - Export button (#downloadExcel) should now be visible")
+    
+    # Verify Export button is visible after Advance search - returns as soon as the UI reveals it
+    try:
+        await page.locator('#downloadExcel').wait_for(state="visible", timeout=10000)
+        logger.info("✅ Verified: Export button (#downloadExcel) is visible after Advance search")
+    except PlaywrightTimeoutError:
+        logger.warning("⚠️ Export button (#downloadExcel) not visible after 10s, but continuing...")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not verify Export button visibility (non-critical): {e}")
+
+
+async def export_tab_isolated(storage_state: Dict, tab_name: str, download_dir: Path, semaphore: asyncio.Semaphore):
+    """
+    Export one tab in its own context (parallel mode). Failures become an error result, except a
+    denied session (HTTPException 401), which is re-raised - every other tab would hit the same wall.
+    """
+    async with semaphore:
+        try:
+            async with authenticated_context(storage_state) as context:
+                page = await context.new_page()
+                await open_dashboard(page)
+                return await export_tab(page, tab_name, download_dir)
+        except Exception as e:
+            if isinstance(e, HTTPException) and e.status_code == 401:
+                raise
+            error = getattr(e, "detail", None) or str(e)
+            logger.error(f"❌ Error exporting tab '{tab_name}' (parallel): {error}")
+            return {"tab": tab_name, "status": "error", "error": error}
+
+
 async def export_dashboard(session_id: str, spreadsheet_id: str, storage_state: Optional[Dict] = None):
     try:
         if not storage_state:
             session_file = SESSION_PATH / f"{session_id}.json"
             try:
-                with open(session_file, "r") as f:
-                    storage_state = json.load(f)
-                    logger.info(f"Loaded session from local file: {session_file}")
+                storage_state = json.loads(session_file.read_bytes())
+                logger.info(f"Loaded session from local file: {session_file}")
             except FileNotFoundError:
                 logger.warning(f"Session file missing locally for {session_id}")
                 raise FileNotFoundError(f"Session file not found: {session_file}. Please provide storage_state in request or ensure session file exists.")
         
-        # CRITICAL: Ensure storage_state is a dict, not a string
-        # If it came as a JSON string, parse it
-        if isinstance(storage_state, str):
-            logger.warning("storage_state received as string, parsing JSON...")
-            try:
-                storage_state = json.loads(storage_state)
-                logger.info("✅ Successfully parsed storage_state from string")
-            except json.JSONDecodeError as parse_err:
-                raise ValueError(f"storage_state is a string but not valid JSON: {parse_err}")
-        
-        # Validate storage_state structure (must be a dict with expected Playwright structure)
+        # Validate storage_state structure (must be a dict with expected Playwright structure).
+        # A stringified state is already parsed by ExportRequest.parse_storage_state.
         if not isinstance(storage_state, dict):
-            raise TypeError(f"storage_state must be a dict or JSON string, got {type(storage_state)}")
+            raise TypeError(f"storage_state must be a dict, got {type(storage_state)}")
         
         # Validate it has Playwright storage state structure
         if "cookies" not in storage_state and "origins" not in storage_state:
             logger.warning("⚠️ storage_state missing 'cookies' or 'origins' - might be invalid")
             # Log structure for debugging
-            logger.debug(f"storage_state keys: {list(storage_state.keys()) if isinstance(storage_state, dict) else 'N/A'}")
+            logger.debug("storage_state keys: %s", list(storage_state))
         
         logger.info(f"✅ Using storage_state with {len(storage_state.get('cookies', []))} cookies")
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True, args=["--no-sandbox"])
-            
-            # CRITICAL: Node.js already destroyed all old contexts and waited 10 seconds
-            # We skip the concurrent session clearing step here to avoid conflicts
-            # Just create the authenticated context directly
-            logger.info("✅ Creating authenticated context with storage_state (Node.js already cleared old sessions)...")
-            
-            # Create context with the storage_state from login
-            context = await browser.new_context(storage_state=storage_state, accept_downloads=True)
+        # CRITICAL: Node.js already destroyed all old contexts and waited 10 seconds
+        # We skip the concurrent session clearing step here to avoid conflicts
+        # Just create the authenticated context directly (on the pooled browser)
+        logger.info("✅ Creating authenticated context with storage_state (Node.js already cleared old sessions)...")
+        
+        async with authenticated_context(storage_state) as context:
             page = await context.new_page()
             
-            # Wait a moment for context to initialize
-            await asyncio.sleep(3)
-            
-            # CRITICAL: Navigate directly to dashboard using the valid cookies from storage_state
-            # We skip root URL to avoid any redirect delays or session validation issues
-            # The cookies in storage_state are valid - we just need to use them in this NEW browser context
-            logger.info("🔍 Navigating directly to dashboard using storage_state cookies...")
-            await page.goto("https://compliancenominationportal.in.pwc.com/BGVAdmin/BGVDashboard", wait_until="networkidle", timeout=60000)
-            await asyncio.sleep(5)  # Wait for dashboard to fully load
-            
-            # Check current URL after navigation
-            current_url = page.url
-            logger.info(f"📍 Current URL after dashboard navigation: {current_url}")
+            # Parallel mode: every tab context opens the dashboard itself, so this page stays off it
+            # until those are done - opening it here too would be one more concurrent dashboard
+            # session on the same cookies (the AccessDeniedConcurrent pattern). It's only for logout.
+            if EXPORT_CONCURRENCY <= 1:
+                await open_dashboard(page)
             
-            # Check for error page or concurrent access denial (current_url is already set above)
-            logger.info(f"📍 Final current URL: {current_url}")
-            
-            # CRITICAL: Check for AccessDeniedConcurrent - session expired/invalid
-            if "AccessDeniedConcurrent" in current_url or "/Login/AccessDeniedConcurrent" in current_url:
-                error_screenshot = f"/tmp/session_expired_{datetime.now().strftime('%H%M%S')}.png"
-                await page.screenshot(path=error_screenshot, full_page=True)
-                await browser.close()
-                logger.error(f"❌ Session expired - AccessDeniedConcurrent detected: {current_url}")
-                
-                # Provide detailed troubleshooting info
-                page_text = await page.locator('body').inner_text() if not page.is_closed() else ""
-                raise HTTPException(
-                    status_code=401,
-                    detail=(
-                        f"Session expired — please start new login session via Node.js.\n\n"
-                        f"AccessDeniedConcurrent detected. This means:\n"
-                        f"1. Another session is still active on PwC server (may need manual logout)\n"
-                        f"2. Session storage_state is invalid or expired\n"
-                        f"3. Timing issue - Node.js may need more time to close old sessions\n\n"
-                        f"Recommended actions:\n"
-                        f"- Wait 60+ seconds after Node.js login completes\n"
-                        f"- Manually logout from PwC portal in any browser\n"
-                        f"- Check if scheduler is running (creates new session every 1h45m)\n\n"
-                        f"URL: {current_url}\n"
-                        f"Screenshot: {error_screenshot}"
-                    )
-                )
-            
-            if "ErrorPage" in current_url or "Oops" in current_url:
-                logger.warning("Detected error page, trying alternative navigation...")
-                error_screenshot = f"/tmp/error_page_{datetime.now().strftime('%H%M%S')}.png"
-                await page.screenshot(path=error_screenshot, full_page=True)
-                logger.error(f"❌ Error page detected: {current_url}. Screenshot: {error_screenshot}")
-                
-                # Try navigating to home page first, then dashboard
-                try:
-                    logger.info("Attempting navigation via home page...")
-                    await page.goto("https://compliancenominationportal.in.pwc.com", wait_until="networkidle", timeout=30000)
-                    await asyncio.sleep(3)
-                    
-                    # Try clicking dashboard link if it exists
-                    dashboard_clicked = await try_click_selector(page, [
-                        'a[href*="BGVDashboard"]',
-                        'a[href*="dashboard"]',
-                        'a:has-text("Dashboard")',
-                        'text="Dashboard"',
-                        'a:has-text("Home")',
-                        'text="Home"'
-                    ], timeout_per=5000)
-                    
-                    if dashboard_clicked:
-                        await page.wait_for_load_state("networkidle", timeout=30000)
-                        await asyncio.sleep(3)
-                        current_url = page.url
-                        logger.info(f"📍 Navigated via link to: {current_url}")
-                    
-                    # If still on error page, try direct URL again
-                    if "ErrorPage" in page.url or "Oops" in page.url:
-                        logger.warning("Still on error page, trying direct dashboard URL again...")
-                        await page.goto("https://compliancenominationportal.in.pwc.com/BGVAdmin/BGVDashboard", wait_until="networkidle", timeout=30000)
-                        await asyncio.sleep(3)
-                        
-                except Exception as nav_err:
-                    logger.error(f"Alternative navigation failed: {nav_err}")
+            download_dir = DOWNLOAD_DIR
+
+            # Each exported tab starts its Sheets sync straight away, so uploads overlap the
+            # remaining tab exports instead of all waiting for STEP 3
+            sheets_uploads = {}
+            upload_semaphore = asyncio.Semaphore(SHEETS_TAB_CONCURRENCY)
+            # No up-front sheet creation here: which tabs will upload isn't known until they export,
+            # so each upload creates its own sheet if missing (sync_to_sheets_with_audit's addSheet)
+            sheets_enabled = bool(spreadsheet_id and GOOGLE_CREDENTIALS_JSON)
             
-            # Final check - verify we're on dashboard, not error page
-            final_url = page.url
-            logger.info(f"📍 Final URL before validation: {final_url}")
+            async def upload(idx: int, tab: str):
+                return await sync_tab_file(idx, tab, download_dir, spreadsheet_id, upload_semaphore)
             
-            # Check for error page in URL
-            if "ErrorPage" in final_url or "Oops" in final_url:
-                error_screenshot = f"/tmp/final_error_page_{datetime.now().strftime('%H%M%S')}.png"
-                await page.screenshot(path=error_screenshot, full_page=True)
-                page_text = await page.locator('body').inner_text()
-                
-                # Check if session might be invalid
-                if "not found" in page_text.lower() or "error" in page_text.lower():
-                    raise Exception(
-                        f"❌ Unable to access dashboard - stuck on error page. "
-                        f"This usually means:\n"
-                        f"1. Session expired or invalid\n"
-                        f"2. User doesn't have dashboard access\n"
-                        f"3. Dashboard URL requires authentication that session lacks\n\n"
-                        f"Expected: https://compliancenominationportal.in.pwc.com/BGVAdmin/BGVDashboard\n"
-                        f"Actual URL: {final_url}\n"
-                        f"Screenshot: {error_screenshot}\n"
-                        f"Please verify the session is valid and try logging in again."
-                    )
-                else:
-                    raise Exception(f"Unable to access dashboard - stuck on error page: {final_url}. Screenshot: {error_screenshot}")
+            def start_upload(idx: int, tab: str, result: Dict):
+                if sheets_enabled and result.get("status") == "done":
+                    sheets_uploads[tab] = asyncio.create_task(upload(idx, tab))
             
-            # Check if page has dashboard content
+            async def export_and_upload(idx: int, tab: str, semaphore: asyncio.Semaphore):
+                result = await export_tab_isolated(storage_state, tab, download_dir, semaphore)
+                start_upload(idx, tab, result)
+                return result
+
             try:
-                page_title = await page.title()
-                page_text = await page.locator('body').inner_text()
-                
-                # More thorough error detection
-                error_indicators = [
-                    "not found" in page_text.lower(),
-                    "error" in page_title.lower(),
-                    "sorry" in page_text.lower() and "error" in page_text.lower(),
-                    "requested page not found" in page_text.lower()
-                ]
-                
-                if any(error_indicators):
-                    error_screenshot = f"/tmp/dashboard_error_{datetime.now().strftime('%H%M%S')}.png"
-                    await page.screenshot(path=error_screenshot, full_page=True)
-                    raise Exception(
-                        f"Dashboard page appears to have error content. "
-                        f"URL: {final_url}\n"
-                        f"Page title: {page_title}\n"
-                        f"Screenshot: {error_screenshot}"
+                # STEP 2: Process each tab
+                # For each tab: Select tab → Wait for load → Click Export → Wait for download → Next tab
+                results = []
+                if EXPORT_CONCURRENCY > 1:
+                    # Each tab gets its own context (same storage_state); this page is only used for logout
+                    logger.info(f"\n{'='*70}")
+                    logger.info(f"📋 STEP 2: Processing {len(TABS)} tabs in parallel ({EXPORT_CONCURRENCY} contexts)...")
+                    logger.info(f"{'='*70}\n")
+                    semaphore = asyncio.Semaphore(EXPORT_CONCURRENCY)
+                    outcomes = await asyncio.gather(
+                        *(export_and_upload(idx, tab, semaphore) for idx, tab in enumerate(TABS, 1)),
+                        return_exceptions=True,
                     )
-            except Exception as check_err:
-                # If we can't check page content, at least verify URL is correct
-                if "ErrorPage" not in final_url and "Oops" not in final_url:
-                    logger.warning(f"Could not verify page content but URL looks OK: {check_err}")
+                    # A denied session aborts the run - raised only once every tab context has closed
+                    denied = next((o for o in outcomes if isinstance(o, BaseException)), None)
+                    if denied is not None:
+                        raise denied
+                    results = list(outcomes)
                 else:
-                    raise check_err
-            
-            # Verify we're actually on dashboard (not just not on error page)
-            if "BGVDashboard" not in final_url and "/dashboard" not in final_url.lower() and "compliancenominationportal" in final_url:
-                logger.warning(f"Not on dashboard URL, but also not on error page: {final_url}")
-                
-                # CRITICAL: Check again for AccessDeniedConcurrent after retry
-                if "AccessDeniedConcurrent" in final_url or "/Login/AccessDeniedConcurrent" in final_url:
-                    error_screenshot = f"/tmp/session_expired_retry_{datetime.now().strftime('%H%M%S')}.png"
-                    await page.screenshot(path=error_screenshot, full_page=True)
-                    await browser.close()
-                    logger.error(f"❌ Session expired on retry - AccessDeniedConcurrent: {final_url}")
-                    raise HTTPException(
-                        status_code=401,
-                        detail=f"Session expired — please start new login session via Node.js. URL: {final_url}. Screenshot: {error_screenshot}"
-                    )
-                
-                # Try to navigate to dashboard one more time
-                try:
-                    await page.goto("https://compliancenominationportal.in.pwc.com/BGVAdmin/BGVDashboard", wait_until="networkidle", timeout=30000)
-                    await asyncio.sleep(3)
-                    final_url = page.url
-                    
-                    # Final check for AccessDeniedConcurrent
-                    if "AccessDeniedConcurrent" in final_url or "/Login/AccessDeniedConcurrent" in final_url:
-                        error_screenshot = f"/tmp/session_expired_final_{datetime.now().strftime('%H%M%S')}.png"
-                        await page.screenshot(path=error_screenshot, full_page=True)
-                        await browser.close()
-                        logger.error(f"❌ Session expired on final retry - AccessDeniedConcurrent: {final_url}")
-                        raise HTTPException(
-                            status_code=401,
-                            detail=f"Session expired — please start new login session via Node.js. URL: {final_url}. Screenshot: {error_screenshot}"
-                        )
-                    
-                    if "ErrorPage" in final_url or "Oops" in final_url:
-                        error_screenshot = f"/tmp/dashboard_nav_failed_{datetime.now().strftime('%H%M%S')}.png"
-                        await page.screenshot(path=error_screenshot, full_page=True)
-                        raise Exception(f"Final navigation to dashboard failed. URL: {final_url}. Screenshot: {error_screenshot}")
-                except HTTPException:
-                    raise  # Re-raise HTTPException for session expired
-                except Exception as nav_err:
-                    if "ErrorPage" in str(nav_err) or "Oops" in str(nav_err):
-                        raise
-                    logger.warning(f"Dashboard navigation warning: {nav_err}")
-            
-            # CRITICAL: Final validation before proceeding - must not be on error page or AccessDeniedConcurrent
-            final_check_url = page.url
-            
-            # Final check for AccessDeniedConcurrent
-            if "AccessDeniedConcurrent" in final_check_url or "/Login/AccessDeniedConcurrent" in final_check_url:
-                error_screenshot = f"/tmp/pre_advance_search_expired_{datetime.now().strftime('%H%M%S')}.png"
-                await page.screenshot(path=error_screenshot, full_page=True)
-                await browser.close()
-                logger.error(f"❌ CRITICAL: Session expired before Advance Search - AccessDeniedConcurrent: {final_check_url}")
-                raise HTTPException(
-                    status_code=401,
-                    detail=f"Session expired — please start new login session via Node.js. Current URL: {final_check_url}. Screenshot: {error_screenshot}"
-                )
-            
-            if "ErrorPage" in final_check_url or "Oops" in final_check_url:
-                error_screenshot = f"/tmp/pre_advance_search_error_{datetime.now().strftime('%H%M%S')}.png"
-                await page.screenshot(path=error_screenshot, full_page=True)
-                page_text_final = await page.locator('body').inner_text()
-                raise Exception(
-                    f"❌ CRITICAL: Still on error page when trying to click Advance Search!\n"
-                    f"This means the session cannot access the dashboard.\n\n"
-                    f"Possible causes:\n"
-                    f"1. Session expired or invalid\n"
-                    f"2. User account doesn't have dashboard access permissions\n"
-                    f"3. Dashboard URL changed or requires different authentication\n"
-                    f"4. Session storage_state is missing required cookies/state\n\n"
-                    f"Current URL: {final_check_url}\n"
-                    f"Page contains: {page_text_final[:200]}...\n"
-                    f"Screenshot: {error_screenshot}\n\n"
-                    f"Action: Please verify login session is valid and user has dashboard access."
-                )
-            
-            # Verify URL actually contains dashboard
-            if "BGVDashboard" not in final_check_url and "/dashboard" not in final_check_url.lower():
-                logger.warning(f"⚠️ URL doesn't contain 'BGVDashboard' or '/dashboard': {final_check_url}")
-                # This might be OK if it's a redirect, but log it
-            
-            logger.info("✅ Successfully navigated to dashboard - URL validated")
-            
-            # CRITICAL STEP 1: Click "Advance search" FIRST
-            # This makes the "Export to excel" button visible
-            # The Export button (id="downloadExcel") only appears after Advance search is clicked
-            logger.info("🔍 STEP 1: Clicking 'Advance search' to reveal Export button...")
-            await click_advance_search(page)
-            logger.info("✅ 'Advance search' clicked - Export button (#downloadExcel) should now be visible")
-            
-            # Verify Export button is visible after Advance search
-            try:
-                await asyncio.sleep(3)  # Brief wait for UI to update
-                export_visible = await page.locator('#downloadExcel').is_visible(timeout=5000)
-                if export_visible:
-                    logger.info("✅ Verified: Export button (#downloadExcel) is visible after Advance search")
-                else:
-                    logger.warning("⚠️ Export button (#downloadExcel) not immediately visible, but continuing...")
-            except Exception as e:
-                logger.warning(f"⚠️ Could not verify Export button visibility (non-critical): {e}")
-            
-            download_dir = TMP_DIR / "dashboard_exports"
-            download_dir.mkdir(parents=True, exist_ok=True)
-
-            # STEP 2: Process each tab sequentially
-            # For each tab: Select tab → Wait for load → Click Export → Wait for download → Next tab
-            logger.info(f"\n{'='*70}")
-            logger.info(f"📋 STEP 2: Processing {len(TABS)} tabs sequentially...")
-            logger.info(f"{'='*70}\n")
-            results = []
-            for idx, tab in enumerate(TABS, 1):
-                try:
                     logger.info(f"\n{'='*70}")
-                    logger.info(f"🔄 Processing tab {idx}/{len(TABS)}: {tab}")
-                    logger.info(f"{'='*70}")
-                    # USER REQUEST: Click all tabs (including first) - no special handling needed
-                    result = await export_tab(page, tab, download_dir, is_first_tab=False)
-                    results.append(result)
-                    # Note: Already waiting 30 seconds after each export inside export_tab()
-                except Exception as e:
-                    logger.error(f"❌ Error exporting tab '{tab}': {e}")
-                    await page.screenshot(path=f"/tmp/{tab}_fail_{datetime.now().strftime('%H%M%S')}.png")
-                    results.append({"tab": tab, "status": "error", "error": str(e)})
+                    logger.info(f"📋 STEP 2: Processing {len(TABS)} tabs sequentially...")
+                    logger.info(f"{'='*70}\n")
+                    for idx, tab in enumerate(TABS, 1):
+                        try:
+                            logger.info(f"\n{'='*70}")
+                            logger.info(f"🔄 Processing tab {idx}/{len(TABS)}: {tab}")
+                            logger.info(f"{'='*70}")
+                            # USER REQUEST: Click all tabs (including first) - no special handling needed
+                            result = await export_tab(page, tab, download_dir, is_first_tab=False)
+                            results.append(result)
+                            start_upload(idx, tab, result)
+                            # USER REQUEST: Wait 30 seconds after export before moving to next tab
+                            # (nothing follows the last tab, and parallel contexts never share a page)
+                            if idx < len(TABS) and INTER_TAB_COOLDOWN:
+                                logger.info(f"⏳ Waiting {INTER_TAB_COOLDOWN} seconds after export before moving to next tab...")
+                                await asyncio.sleep(INTER_TAB_COOLDOWN)
+                        except Exception as e:
+                            logger.error(f"❌ Error exporting tab '{tab}': {e}")
+                            await snap_error(page, f"{tab}_fail")
+                            results.append({"tab": tab, "status": "error", "error": str(e)})
 
-            await perform_logout(page)
-            await browser.close()
+                if EXPORT_CONCURRENCY > 1:
+                    # Tab contexts are closed by now - load the dashboard header (Welcome menu) for logout
+                    try:
+                        await goto_dashboard(page)
+                    except Exception as nav_err:
+                        logger.warning(f"⚠️ Could not open dashboard for logout: {nav_err}")
+                await perform_logout(page)
+                await context.close()
             
-            # STEP 3: Upload all exported Excel files to Google Sheets
-            logger.info(f"\n{'='*70}")
-            logger.info(f"🔍 STEP 3: Checking Google Sheets configuration...")
-            logger.info(f"📋 spreadsheet_id provided: {spreadsheet_id}")
-            logger.info(f"📋 GOOGLE_SHEET_ID env var: {GOOGLE_SHEET_ID}")
-            logger.info(f"📋 GOOGLE_CREDENTIALS_JSON set: {'Yes' if GOOGLE_CREDENTIALS_JSON else 'No'}")
-            logger.info(f"{'='*70}\n")
+                # STEP 3: Upload all exported Excel files to Google Sheets
+                logger.info(f"\n{'='*70}")
+                logger.info(f"🔍 STEP 3: Checking Google Sheets configuration...")
+                logger.info(f"📋 spreadsheet_id provided: {spreadsheet_id}")
+                logger.info(f"📋 GOOGLE_SHEET_ID env var: {GOOGLE_SHEET_ID}")
+                logger.info(f"📋 GOOGLE_CREDENTIALS_JSON set: {'Yes' if GOOGLE_CREDENTIALS_JSON else 'No'}")
+                logger.info(f"{'='*70}\n")
             
-            if spreadsheet_id:
-                logger.info(f"📤 STEP 3: Uploading exported Excel files to Google Sheets...")
-                logger.info(f"📋 Using spreadsheet_id: {spreadsheet_id}\n")
+                if spreadsheet_id:
+                    logger.info(f"📤 STEP 3: Uploading exported Excel files to Google Sheets...")
+                    logger.info(f"📋 Using spreadsheet_id: {spreadsheet_id}\n")
                 
-                try:
-                    # Verify credentials are available
-                    if not GOOGLE_CREDENTIALS_JSON:
-                        raise ValueError("GOOGLE_CREDENTIALS_JSON environment variable is not set. Please add it in Render environment variables.")
+                    try:
+                        # Verify credentials are available
+                        if not GOOGLE_CREDENTIALS_JSON:
+                            raise ValueError("GOOGLE_CREDENTIALS_JSON environment variable is not set. Please add it in Render environment variables.")
                     
-                    logger.info(f"✅ Google credentials found, starting upload...")
-                    tab_results = await sync_all_tabs_to_sheets(download_dir, spreadsheet_id)
-                    logger.info(f"✅ Google Sheets upload completed: {len(tab_results)} tab(s) processed")
-                    return {"ok": True, "tabs": results, "sheets_sync": tab_results}
-                except Exception as sync_err:
-                    logger.error(f"❌ Google Sheets sync failed: {sync_err}")
-                    logger.error(f"❌ Error type: {type(sync_err).__name__}")
-                    import traceback
-                    logger.error(f"❌ Error traceback: {traceback.format_exc()}")
-                    logger.error(f"Export completed but Sheets sync failed - files saved in {download_dir}")
-                    return {"ok": True, "tabs": results, "sheets_sync_error": str(sync_err), "error_type": type(sync_err).__name__}
-            else:
-                logger.warning("⚠️ No GOOGLE_SHEET_ID provided - skipping Google Sheets upload")
-                logger.warning("💡 Set GOOGLE_SHEET_ID environment variable in Render to enable Sheets upload")
-                return {"ok": True, "tabs": results, "sheets_sync": "skipped", "reason": "GOOGLE_SHEET_ID not set"}
+                        logger.info(f"✅ Google credentials found, {len(sheets_uploads)} tab upload(s) already started, finishing the rest...")
+                        # Sequential mode: tabs whose export failed still sync whatever file is on disk, as before.
+                        # Parallel mode: that file is from an earlier run, so those tabs are skipped
+                        for idx, tab in enumerate(TABS, 1):
+                            if tab not in sheets_uploads and EXPORT_CONCURRENCY <= 1:
+                                sheets_uploads[tab] = asyncio.create_task(upload(idx, tab))
+                        # The uploads are already running as tasks, so awaiting them in TABS order doesn't serialise them
+                        tab_results = [
+                            await sheets_uploads[tab] if tab in sheets_uploads
+                            else {"tab": tab, "status": "skipped", "reason": "tab not exported in this run"}
+                            for tab in TABS
+                        ]
+                        logger.info(f"✅ Google Sheets upload completed: {len(tab_results)} tab(s) processed")
+                        return {"ok": True, "tabs": results, "sheets_sync": tab_results}
+                    except Exception as sync_err:
+                        logger.error(f"❌ Google Sheets sync failed: {sync_err}")
+                        logger.error(f"❌ Error type: {type(sync_err).__name__}")
+                        logger.error(f"❌ Error traceback: {traceback.format_exc()}")
+                        logger.error(f"Export completed but Sheets sync failed - files saved in {download_dir}")
+                        return {"ok": True, "tabs": results, "sheets_sync_error": str(sync_err), "error_type": type(sync_err).__name__}
+                else:
+                    logger.warning("⚠️ No GOOGLE_SHEET_ID provided - skipping Google Sheets upload")
+                    logger.warning("💡 Set GOOGLE_SHEET_ID environment variable in Render to enable Sheets upload")
+                    return {"ok": True, "tabs": results, "sheets_sync": "skipped", "reason": "GOOGLE_SHEET_ID not set"}
+            finally:
+                # Never hand back the export slot while uploads still read DOWNLOAD_DIR - if anything
+                # above raised (or we were cancelled), let the started uploads finish first. They are
+                # awaited, not cancelled: their Sheets calls run in pool threads that can't be interrupted
+                pending = [t for t in sheets_uploads.values() if not t.done()]
+                if pending:
+                    logger.warning(f"⏳ Waiting for {len(pending)} in-flight Sheets task(s) before releasing the export")
+                    await asyncio.gather(*pending, return_exceptions=True)
 
+    except HTTPException:
+        # Already carries its status (e.g. 401 for a denied session) - don't flatten it to a 500
+        raise
     except Exception as e:
         logger.error(f"Export error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1296,6 +1620,7 @@ class ExportRequest(BaseModel):
     session_id: str
     spreadsheet_id: Optional[str] = None
     storage_state: Optional[Dict] = None
+    background: bool = False  # return 202 + job_id immediately; poll /export-status/{job_id}
     
     @field_validator('storage_state', mode='before')
     @classmethod
@@ -1308,7 +1633,7 @@ class ExportRequest(BaseModel):
             try:
                 return json.loads(v)
             except json.JSONDecodeError:
-                raise ValueError(f"storage_state is a string but not valid JSON")
+                raise ValueError("storage_state is a string but not valid JSON. Ensure Node.js sends it as an object, not a stringified JSON.")
         if isinstance(v, dict):
             return v
         raise ValueError(f"storage_state must be a dict or JSON string, got {type(v)}")
@@ -1327,90 +1652,133 @@ async def export_endpoint(req: ExportRequest):
             detail=f"Export already in progress for session {current_export_session_id}. Only one export can run at a time. This request for session {req.session_id} is cancelled. Wait for the current export to finish and push data to sheets."
         )
     
-    # Acquire lock to prevent race conditions
-    async with export_lock:
-        # Double-check after acquiring lock (handle race condition)
-        if export_in_progress:
-            logger.warning(f"⚠️ Export already in progress for session {current_export_session_id} (race condition caught) - rejecting request for session {req.session_id}")
-            raise HTTPException(
-                status_code=429,
-                detail=f"Export already in progress for session {current_export_session_id}. Only one export can run at a time."
-            )
-        
-        # Mark this session as the current export
-        # This ensures: one session = one export run (any concurrent requests will be rejected above)
-        export_in_progress = True
-        current_export_session_id = req.session_id
-        logger.info(f"🔒 Export lock acquired - starting export for session {req.session_id}. All other concurrent requests will be cancelled.")
-        
-        try:
-            spreadsheet_id = req.spreadsheet_id or GOOGLE_SHEET_ID
-            if not spreadsheet_id:
-                raise HTTPException(status_code=400, detail="spreadsheet_id required (set GOOGLE_SHEET_ID env or provide in request)")
-            
-            # Handle storage_state - ensure it's properly formatted
-            storage_state = req.storage_state
-            if storage_state:
-                # If Pydantic received it as a string (due to JSON double-encoding), parse it
-                if isinstance(storage_state, str):
-                    try:
-                        storage_state = json.loads(storage_state)
-                        logger.info("✅ Parsed storage_state from string in request")
-                    except json.JSONDecodeError:
-                        raise HTTPException(
-                            status_code=400,
-                            detail="storage_state is a string but not valid JSON. Ensure Node.js sends it as an object, not a stringified JSON."
-                        )
-                
-                # Validate it's a dict
-                if not isinstance(storage_state, dict):
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"storage_state must be a dict or valid JSON string, got {type(storage_state)}"
-                    )
-                
-                logger.info(f"✅ Received storage_state with {len(storage_state.get('cookies', []))} cookies")
-            
-            result = await export_dashboard(req.session_id, spreadsheet_id, storage_state)
-            logger.info(f"✅ Export completed successfully for session {req.session_id} - data pushed to sheets")
-            return JSONResponse(content=result)
-        
-        finally:
-            # Always release the lock and clear session tracking, even if export fails
-            # This allows the next auto-run (4 hours later) to start fresh
-            export_in_progress = False
-            completed_session = current_export_session_id
-            current_export_session_id = None
-            logger.info(f"🔓 Export lock released - session {completed_session} export finished. Next auto-run can start fresh. Any queued/concurrent requests for this session were cancelled.")
+    # Mark this session as the current export - no await since the check above, so no other request
+    # can slip in between. This ensures: one session = one export run
+    export_in_progress = True
+    current_export_session_id = req.session_id
+    logger.info(f"🔒 Export slot acquired - starting export for session {req.session_id}. All other concurrent requests will be cancelled.")
+    
+    released_by_job = False
+    try:
+        spreadsheet_id = req.spreadsheet_id or GOOGLE_SHEET_ID
+        if not spreadsheet_id:
+            raise HTTPException(status_code=400, detail="spreadsheet_id required (set GOOGLE_SHEET_ID env or provide in request)")
+        
+        # ExportRequest.parse_storage_state has already turned a double-encoded string into a dict
+        storage_state = req.storage_state
+        if storage_state:
+            logger.info(f"✅ Received storage_state with {len(storage_state.get('cookies', []))} cookies")
+        
+        if req.background:
+            # The job now owns the export slot and releases it when it finishes
+            job_id = uuid.uuid4().hex
+            EXPORT_JOBS[job_id] = {"job_id": job_id, "session_id": req.session_id, "status": "running", "started_at": datetime.now().isoformat()}
+            while len(EXPORT_JOBS) > EXPORT_JOBS_KEPT:
+                EXPORT_JOBS.pop(next(iter(EXPORT_JOBS)))
+            task = asyncio.create_task(_run_export_job(job_id, req.session_id, spreadsheet_id, storage_state))
+            _export_job_tasks.add(task)
+            task.add_done_callback(_export_job_tasks.discard)
+            released_by_job = True
+            logger.info(f"📨 Export for session {req.session_id} running in background as job {job_id}")
+            return JSONResponse(status_code=202, content={"ok": True, "job_id": job_id, "status": "running", "status_url": f"/export-status/{job_id}"})
+        
+        result = await export_dashboard(req.session_id, spreadsheet_id, storage_state)
+        logger.info(f"✅ Export completed successfully for session {req.session_id} - data pushed to sheets")
+        return JSONResponse(content=result)
+    
+    finally:
+        if not released_by_job:
+            _release_export_slot()
+
+
+def _release_export_slot():
+    """Clear the single-export flag so the next export can start"""
+    global export_in_progress, current_export_session_id
+    # Always release the slot and clear session tracking, even if export fails
+    # This allows the next auto-run (4 hours later) to start fresh
+    export_in_progress = False
+    completed_session = current_export_session_id
+    current_export_session_id = None
+    logger.info(f"🔓 Export lock released - session {completed_session} export finished. Next auto-run can start fresh. Any queued/concurrent requests for this session were cancelled.")
+
+
+async def _run_export_job(job_id: str, session_id: str, spreadsheet_id: str, storage_state: Optional[Dict]):
+    """Background body of POST /export-dashboard?background - records the outcome in EXPORT_JOBS"""
+    job = EXPORT_JOBS.get(job_id, {})
+    try:
+        result = await export_dashboard(session_id, spreadsheet_id, storage_state)
+        job.update(status="done", result=result)
+        logger.info(f"✅ Background export job {job_id} completed for session {session_id} - data pushed to sheets")
+    except Exception as e:
+        error = getattr(e, "detail", None) or str(e)
+        job.update(status="error", error=error, status_code=getattr(e, "status_code", 500))
+        logger.error(f"❌ Background export job {job_id} failed: {error}")
+    finally:
+        job["finished_at"] = datetime.now().isoformat()
+        _release_export_slot()
+
+
+@app.get("/export-status/{job_id}")
+async def export_status(job_id: str):
+    """Status (and result, once done) of a background export job"""
+    job = EXPORT_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export job: {job_id}")
+    return JSONResponse(content=job)
 
 
 @app.get("/screenshots")
-async def list_screenshots():
-    """List all available screenshots"""
-    screenshot_files = []
-    tmp_dir = Path("/tmp")
-    for file in tmp_dir.glob("*.png"):
-        if file.is_file():
-            screenshot_files.append({
-                "filename": file.name,
-                "size_bytes": file.stat().st_size,
-                "modified": datetime.fromtimestamp(file.stat().st_mtime).isoformat(),
-                "url": f"/screenshots/{file.name}"
-            })
+async def list_screenshots(request: Request):
+    """List all available screenshots (304 when nothing changed since the caller's ETag)"""
+    # scandir hands back the file type with each entry, so one stat() per screenshot is all it costs
+    entries = []
+    with os.scandir("/tmp") as it:
+        for entry in it:
+            if entry.name.endswith(".png") and entry.is_file(follow_symlinks=False):
+                entries.append((entry.name, entry.stat(follow_symlinks=False)))
+    entries.sort(key=lambda e: e[1].st_mtime, reverse=True)
+    # Names + mtimes identify the listing, so a polling UI gets a bodyless 304 until a screenshot changes
+    # (a change detector, not a security hash - usedforsecurity=False keeps it working on FIPS hosts)
+    listing = "".join(f"{name}:{st.st_mtime_ns}/" for name, st in entries).encode()
+    etag = '"' + hashlib.md5(listing, usedforsecurity=False).hexdigest() + '"'
+    # If-None-Match may list several tags, and uses weak comparison (a W/ prefix still matches)
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    screenshot_files = [
+        {
+            "filename": name,
+            "size_bytes": st.st_size,
+            "modified": datetime.fromtimestamp(st.st_mtime).isoformat(),
+            "url": f"/screenshots/{name}"
+        }
+        for name, st in entries
+    ]
     return JSONResponse(content={
         "ok": True,
-        "screenshots": sorted(screenshot_files, key=lambda x: x["modified"], reverse=True),
+        "screenshots": screenshot_files,
         "count": len(screenshot_files)
-    })
+    }, headers={"ETag": etag})
 
 
 @app.get("/screenshots/{filename}")
 async def get_screenshot(filename: str):
     """Get a specific screenshot image"""
-    file_path = Path(f"/tmp/{filename}")
-    if file_path.exists():
-        return FileResponse(file_path, media_type="image/png")
-    raise HTTPException(status_code=404, detail=f"Screenshot not found: {filename}")
+    tmp_dir = Path("/tmp").resolve()
+    file_path = (tmp_dir / filename).resolve()
+    # Only PNGs directly inside /tmp - no "../" or symlink escapes
+    if file_path.parent != tmp_dir or file_path.suffix != ".png":
+        raise HTTPException(status_code=400, detail=f"Invalid screenshot name: {filename}")
+    try:
+        st = file_path.stat()
+    except FileNotFoundError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail=f"Screenshot not found: {filename}")
+    # FileResponse streams via sendfile and sets ETag/Last-Modified; names carry a timestamp so caching is safe.
+    # Handing it our stat_result saves it a second stat of the same file
+    return FileResponse(file_path, stat_result=st, media_type="image/png", headers={"Cache-Control": "public, max-age=3600"})
 
 
 class UploadRequest(BaseModel):
@@ -1446,32 +1814,28 @@ async def upload_to_sheets_only(req: Optional[UploadRequest] = None):
         logger.info(f"📋 Using spreadsheet_id: {spreadsheet_id}")
         logger.info(f"{'='*70}\n")
         
-        download_dir = TMP_DIR / "dashboard_exports"
+        download_dir = DOWNLOAD_DIR
         
-        # Create directory if it doesn't exist (harmless if no files)
-        download_dir.mkdir(parents=True, exist_ok=True)
-        
-        if not download_dir.exists():
-            raise HTTPException(
-                status_code=500,
-                detail=f"Could not create export directory: {download_dir}"
-            )
-        
-        # Check which Excel files exist
+        # Check which Excel files exist - one directory read instead of exists()+stat() per tab
+        # (a missing directory just means nothing has been exported yet)
+        try:
+            with os.scandir(download_dir) as it:
+                present = {entry.name: entry.stat() for entry in it if entry.is_file()}
+        except FileNotFoundError:
+            present = {}
         existing_files = []
         missing_files = []
         for tab in TABS:
-            excel_path = download_dir / f"{tab}.xlsx"
-            if excel_path.exists():
-                file_size = excel_path.stat().st_size
-                existing_files.append({"tab": tab, "file": str(excel_path), "size_bytes": file_size})
+            st = present.get(TAB_FILENAMES[tab])
+            if st is not None:
+                existing_files.append({"tab": tab, "file": str(download_dir / TAB_FILENAMES[tab]), "size_bytes": st.st_size})
             else:
                 missing_files.append(tab)
         
         if not existing_files:
             error_msg = (
                 f"No Excel files found in {download_dir}. "
-                f"Expected files: {', '.join([f'{tab}.xlsx' for tab in TABS[:3]])}... "
+                f"Expected files: {', '.join(TAB_FILENAMES[tab] for tab in TABS[:3])}... "
                 f"\n\nTo generate files:\n"
                 f"1. Wait for scheduled login/export (every 4 hours)\n"
                 f"2. Or trigger full export: POST /export-dashboard\n"
@@ -1517,7 +1881,6 @@ async def upload_to_sheets_only(req: Optional[UploadRequest] = None):
         raise
     except Exception as e:
         logger.error(f"Upload to Sheets error: {e}")
-        import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
 
@@ -1528,11 +1891,11 @@ async def test_sheets():
         if not GOOGLE_SHEET_ID:
             raise HTTPException(status_code=400, detail="GOOGLE_SHEET_ID required")
         
-        service = get_sheets_service()
+        service = await _get_sheets_service_async()
         test_row = ["✅ Connection test", datetime.now().isoformat()]
         
         # First, get spreadsheet metadata to see existing sheets
-        spreadsheet = service.spreadsheets().get(spreadsheetId=GOOGLE_SHEET_ID).execute()
+        spreadsheet = await _execute(service.spreadsheets().get(spreadsheetId=GOOGLE_SHEET_ID), idempotent=True)
         sheets = spreadsheet.get('sheets', [])
         
         sheet_name = "TestConnection"
@@ -1554,22 +1917,22 @@ async def test_sheets():
                     }
                 }
             }
-            batch_update = service.spreadsheets().batchUpdate(
+            batch_update = await _execute(service.spreadsheets().batchUpdate(
                 spreadsheetId=GOOGLE_SHEET_ID,
                 body={'requests': [add_sheet_request]}
-            ).execute()
+            ))
             sheet_id = batch_update['replies'][0]['addSheet']['properties']['sheetId']
             logger.info(f"✅ Created sheet {sheet_name} (ID: {sheet_id})")
         
         # Write test row to the sheet
         range_name = f"{sheet_name}!A1:B1"
-        result = service.spreadsheets().values().append(
+        result = await _execute(service.spreadsheets().values().append(
             spreadsheetId=GOOGLE_SHEET_ID,
             range=range_name,
             valueInputOption="RAW",
             insertDataOption="INSERT_ROWS",
             body={"values": [test_row]},
-        ).execute()
+        ))
         
         logger.info(f"✅ Test row written to {GOOGLE_SHEET_ID} / {sheet_name}")
         return JSONResponse(content={
@@ -1581,7 +1944,6 @@ async def test_sheets():
         })
     except Exception as e:
         logger.error(f"Test Sheets error: {e}")
-        import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Test failed: {e}")
 